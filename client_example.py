@@ -4,25 +4,157 @@ Example client for the Mystery Protocol Server.
 Demonstrates how to use the new server endpoints.
 """
 
+import io
+import sys
+import functools
+import urllib.parse
 import requests
-import json
-import base64
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+import orjson
 import logging
+import random
 import uuid
-import bz2
-from mystery_protocol import MysteryProtocol
+from concurrent.futures import ThreadPoolExecutor
+import zstandard as zstd
+from mystery_protocol import MysteryProtocol, json_default
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=1)
+def _shared_protocol() -> MysteryProtocol:
+    """Return the process-wide MysteryProtocol instance."""
+    return MysteryProtocol()
+
+@functools.lru_cache(maxsize=1)
+def _shared_keys():
+    """Provision verifier and owner keys once and reuse them across demos."""
+    return _shared_protocol().provision_keys()
+
+def _report(*lines):
+    """Write one logical step of demo output to stdout with a single write call."""
+    sys.stdout.write("\n".join(lines) + "\n")
+
+def _iter_json_chunks(obj):
+    """Yield the JSON encoding of obj one top-level member at a time.
+    
+    Keys are emitted in insertion order; owner_finalize_data already builds its
+    package in canonical (sorted) key order, so no sorting pass is needed.
+    """
+    if not isinstance(obj, dict) or not obj:
+        yield orjson.dumps(obj, default=json_default)
+        return
+    
+    separator = b'{'
+    for key, value in obj.items():
+        yield separator + orjson.dumps(key) + b':'
+        yield orjson.dumps(value, default=json_default)
+        separator = b','
+    yield b'}'
+
+class _ConcatBody:
+    """Read-only file-like view over several byte buffers, sent as one request body.
+    
+    requests takes Content-Length from __len__ and http.client streams the body
+    through read(), so the buffers are never joined into a single bytes object.
+    """
+    
+    def __init__(self, *parts):
+        self._parts = [memoryview(part) for part in parts]
+        self._length = sum(part.nbytes for part in self._parts)
+    
+    def __len__(self):
+        return self._length
+    
+    def read(self, size=-1):
+        if size is None or size < 0:
+            remaining, self._parts = self._parts, []
+            return b''.join(remaining)
+        # Short reads never cross a buffer boundary; callers loop until b''
+        while self._parts and not self._parts[0].nbytes:
+            self._parts.pop(0)
+        if not self._parts:
+            return b''
+        head = self._parts[0]
+        self._parts[0] = head[size:]
+        return bytes(head[:size])
+
 class MysteryServerClient:
     """Client for interacting with the Mystery Protocol Server."""
     
-    def __init__(self, server_url: str = "http://localhost:1776"):
+    def __init__(self, server_url: str = "http://localhost:1776", dict_data: bytes = None,
+                 timeout: tuple = (3.05, 30)):
+        """Create a client.
+        
+        Args:
+            server_url: Base URL of the Mystery Protocol Server
+            dict_data: Optional zstd dictionary shared with the server
+            timeout: (connect, read) timeout in seconds applied to every request
+        """
         self.server_url = server_url
-        self.protocol = MysteryProtocol()
+        self.timeout = timeout
+        self.protocol = _shared_protocol()
         self._last_compressed_data = None
+        self._last_uncompressed_size = 0
+        # One compressor is reused for every upload; dict_data must match the server's dictionary
+        self._zctx = zstd.ZstdCompressor(level=6, threads=-1, write_checksum=False,
+                                         dict_data=zstd.ZstdCompressionDict(dict_data) if dict_data else None)
+        
+        # Reuse one keep-alive connection pool for every request to the server. Connection
+        # failures are retried for every method; gateway errors only for idempotent ones,
+        # since a retried POST could be recorded twice (e.g. as two verification attempts)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10,
+                              max_retries=Retry(total=2, backoff_factor=0.1,
+                                                status_forcelist=(502, 503, 504), raise_on_status=False))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # Advertise every content-encoding urllib3 can decode here (zstd needs backports.zstd on Python < 3.14)
+        self.session.headers.update({'User-Agent': 'mystery-client/1', 'Accept-Encoding': ACCEPT_ENCODING})
+    
+    def close(self):
+        """Close the underlying HTTP session and its pooled connections."""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    @classmethod
+    def train_dict(cls, samples: list, dict_size: int = 64_000) -> bytes:
+        """Train a zstd dictionary from serialized challenge packages.
+        
+        Args:
+            samples: List of uncompressed JSON challenge packages as bytes
+            dict_size: Maximum dictionary size in bytes
+            
+        Returns:
+            Dictionary bytes to pass as dict_data and to the server's ZSTD_DICTIONARY_PATH
+        """
+        return zstd.train_dictionary(dict_size, samples).as_bytes()
+    
+    def compress_challenge_package(self, challenge_package: dict):
+        """Serialize and zstd-compress a challenge package for upload.
+        
+        Args:
+            challenge_package: Dictionary containing the challenge package data
+            
+        Returns:
+            Tuple of (compressed_bytes, uncompressed_size)
+        """
+        # Stream the JSON encoding through zstd so the full document is never held in memory
+        buf = io.BytesIO()
+        uncompressed_size = 0
+        with self._zctx.stream_writer(buf, closefd=False) as writer:
+            for chunk in _iter_json_chunks(challenge_package):
+                writer.write(chunk)
+                uncompressed_size += len(chunk)
+        return buf.getvalue(), uncompressed_size
     
     def submit_challenge_data(self, challenge_package: dict, unencrypted_mapping: list, user_id: str, key_name: str, key_index: int, segments: int = 10):
         """Submit challenge data file with unencrypted mapping to server.
@@ -35,30 +167,45 @@ class MysteryServerClient:
             key_index: Integer index for the key
             segments: Number of segments for mapping obfuscation (default: 10)
         """
-        url = f"{self.server_url}/submit_challenge_data"
+        compressed, uncompressed_size = self.compress_challenge_package(challenge_package)
+        return self.submit_challenge_data_raw(compressed, uncompressed_size, orjson.dumps(unencrypted_mapping),
+                                              user_id, key_name, key_index, segments)
+    
+    def submit_challenge_data_raw(self, compressed_bytes: bytes, uncompressed_size: int, unencrypted_mapping_bytes: bytes,
+                                  user_id: str, key_name: str, key_index: int, segments: int = 10):
+        """Submit an already serialized and compressed challenge package to server.
         
-        # Compress the challenge package using bz2
-        json_str = json.dumps(challenge_package, sort_keys=True)
-        compressed = bz2.compress(json_str.encode('utf-8'))
+        Batch producers can compute the package bytes once with
+        compress_challenge_package() and upload many of them over the same session.
         
-        # Store for statistics
-        self._last_compressed_data = compressed
+        Args:
+            compressed_bytes: zstd-compressed JSON challenge package
+            uncompressed_size: Size of the JSON challenge package before compression
+            unencrypted_mapping_bytes: JSON-encoded unencrypted mapping
+            user_id: UUID string identifying the user
+            key_name: String identifier for the key (max 64 chars)
+            key_index: Integer index for the key
+            segments: Number of segments for mapping obfuscation (default: 10)
+        """
+        url = f"{self.server_url}/v2/submit_challenge_data"
         
-        # Prepare multipart form data
-        files = {
-            'challenge_package_compressed': ('challenge_package.bz2', compressed, 'application/octet-stream')
-        }
+        # Store for statistics
+        self._last_compressed_data = compressed_bytes
+        self._last_uncompressed_size = uncompressed_size
         
-        data = {
-            'unencrypted_mapping': json.dumps(unencrypted_mapping),
-            'user_id': user_id,
-            'key_name': key_name,
-            'key_index': str(key_index),
-            'segments': str(segments)
+        # The body is the compressed mapping followed by the compressed package; scalar fields go in headers
+        mapping_section = self._zctx.compress(unencrypted_mapping_bytes)
+        headers = {
+            'Content-Type': 'application/octet-stream',
+            'X-User-Id': user_id,
+            'X-Key-Name': urllib.parse.quote(key_name, safe=''),
+            'X-Key-Index': str(key_index),
+            'X-Segments': str(segments),
+            'X-Mapping-Length': str(len(mapping_section))
         }
         
-        response = requests.post(url, files=files, data=data)
-        return response.json(), response.status_code
+        response = self.session.post(url, data=_ConcatBody(mapping_section, compressed_bytes), headers=headers, timeout=self.timeout)
+        return orjson.loads(response.content), response.status_code
     
     def get_authentication_challenge(self, user_id: str, key_name: str, timeout_minutes: int = 30):
         """Get an authentication challenge from the server for a specific user and key."""
@@ -69,58 +216,58 @@ class MysteryServerClient:
             'timeout_minutes': timeout_minutes
         }
         
-        response = requests.post(url, json=data)
-        return response.json(), response.status_code
+        response = self.session.post(url, json=data, timeout=self.timeout)
+        return orjson.loads(response.content), response.status_code
     
     def verify_solution(self, session_token: str, target_sequence: list, verifier_private_key: bytes):
         """Verify a solution against the server."""
         url = f"{self.server_url}/verify_solution"
+        # Send the key as a raw binary part rather than base64 inside JSON
+        files = {
+            'verifier_private_key': ('key.bin', verifier_private_key, 'application/octet-stream')
+        }
         data = {
             'session_token': session_token,
-            'target_sequence': target_sequence,
-            'verifier_private_key': base64.b64encode(verifier_private_key).decode('utf-8')
+            'target_sequence': orjson.dumps(target_sequence).decode()
         }
         
-        response = requests.post(url, json=data)
-        return response.json(), response.status_code
+        response = self.session.post(url, files=files, data=data, timeout=self.timeout)
+        return orjson.loads(response.content), response.status_code
     
     def get_session_status(self, session_token: str):
         """Get the status of an authentication session."""
         url = f"{self.server_url}/session_status/{session_token}"
         
-        response = requests.get(url)
-        return response.json(), response.status_code
+        response = self.session.get(url, timeout=self.timeout)
+        return orjson.loads(response.content), response.status_code
     
     def get_stats(self):
         """Get server statistics."""
         url = f"{self.server_url}/stats"
         
-        response = requests.get(url)
-        return response.json(), response.status_code
+        response = self.session.get(url, timeout=self.timeout)
+        return orjson.loads(response.content), response.status_code
     
     def get_rate_limit_status(self, session_token: str):
         """Get the rate limit status for a specific session."""
         url = f"{self.server_url}/rate_limit_status/{session_token}"
         
-        response = requests.get(url)
-        return response.json(), response.status_code
+        response = self.session.get(url, timeout=self.timeout)
+        return orjson.loads(response.content), response.status_code
 
 def demo_complete_workflow():
     """Demonstrate the complete workflow with the server."""
-    print("=" * 80)
-    print("MYSTERY PROTOCOL SERVER DEMO")
-    print("=" * 80)
+    _report("=" * 80, "MYSTERY PROTOCOL SERVER DEMO", "=" * 80)
     
     client = MysteryServerClient()
     
     # Step 1: Generate protocol data
-    print("\n1. Generating protocol data...")
-    protocol = MysteryProtocol()
+    protocol = client.protocol
     secret_string = "Demo123!"
     segments = 4  # Use 15 segments for demo (more than default 10 for enhanced obfuscation)
     
     # Generate keys
-    verifier_keys, owner_keys = protocol.provision_keys()
+    verifier_keys, owner_keys = _shared_keys()
     
     # Generate prize and mappings
     prize_data = protocol.generate_prize(owner_keys['public_context'])
@@ -148,19 +295,16 @@ def demo_complete_workflow():
         prize_data
     )
     
-    print(f"✅ Protocol data generated for secret: '{secret_string}'")
+    _report("\n1. Generating protocol data...",
+            f"✅ Protocol data generated for secret: '{secret_string}'")
     
     # Step 2: Submit challenge data to server
-    print("\n2. Submitting challenge data to server...")
     
     # Generate user credentials
     user_id = str(uuid.uuid4())
     key_name = "demo_key"
     key_index = 1
     
-    # Calculate original size for compression stats
-    original_size = len(json.dumps(challenge_package, sort_keys=True).encode('utf-8'))
-    
     response, status_code = client.submit_challenge_data(
         challenge_package, 
         mappings_data['secret_mappings'],
@@ -171,31 +315,33 @@ def demo_complete_workflow():
     )
     
     if status_code == 201:
-        print(f"✅ Challenge data submitted successfully")
-        
         # Show compression statistics
+        original_size = client._last_uncompressed_size
         compressed_size = len(client._last_compressed_data)
         compression_ratio = (1 - compressed_size / original_size) * 100
-        print(f"   Compression: {original_size} bytes → {compressed_size} bytes ({compression_ratio:.1f}% reduction)")
+        _report("\n2. Submitting challenge data to server...",
+                f"✅ Challenge data submitted successfully",
+                f"   Compression: {original_size} bytes → {compressed_size} bytes ({compression_ratio:.1f}% reduction)")
     else:
-        print(f"❌ Failed to submit challenge data: {response}")
+        _report("\n2. Submitting challenge data to server...",
+                f"❌ Failed to submit challenge data: {response}")
         return
     
     # Step 3: Get authentication challenge
-    print("\n3. Getting authentication challenge...")
     challenge_response, status_code = client.get_authentication_challenge(user_id, key_name, timeout_minutes=10)
     
     if status_code == 200:
         session_token = challenge_response['session_token']
-        print(f"✅ Authentication challenge received")
-        print(f"   Session Token: {session_token}")
-        print(f"   Expires At: {challenge_response['expires_at']}")
+        _report("\n3. Getting authentication challenge...",
+                f"✅ Authentication challenge received",
+                f"   Session Token: {session_token}",
+                f"   Expires At: {challenge_response['expires_at']}")
     else:
-        print(f"❌ Failed to get authentication challenge: {challenge_response}")
+        _report("\n3. Getting authentication challenge...",
+                f"❌ Failed to get authentication challenge: {challenge_response}")
         return
     
     # Step 4: Solve the challenge
-    print("\n4. Solving the authentication challenge...")
     # Use only the actual secret string length from the stored extended mapping
     original_mapping = challenge_response['mapping'][:len(secret_string)]
     correct_sequence = protocol.get_correct_sequence(
@@ -203,10 +349,10 @@ def demo_complete_workflow():
         secret_string
     )
     
-    print(f"   Correct sequence: {correct_sequence}")
+    _report("\n4. Solving the authentication challenge...",
+            f"   Correct sequence: {correct_sequence}")
     
     # Step 5: Verify solution
-    print("\n5. Verifying solution...")
     verify_response, status_code = client.verify_solution(
         session_token,
         correct_sequence,
@@ -215,85 +361,93 @@ def demo_complete_workflow():
     
     if status_code == 200:
         result = verify_response['verification_result']
-        print(f"✅ Verification completed")
-        print(f"   Match: {result['is_match']}")
-        print(f"   Prize Value: {result['prize_value']}")
-        print(f"   Message: {verify_response['message']}")
+        _report("\n5. Verifying solution...",
+                f"✅ Verification completed",
+                f"   Match: {result['is_match']}",
+                f"   Prize Value: {result['prize_value']}",
+                f"   Message: {verify_response['message']}")
     else:
-        print(f"❌ Verification failed: {verify_response}")
+        _report("\n5. Verifying solution...",
+                f"❌ Verification failed: {verify_response}")
         return
     
+    # Steps 6-7 are independent reads, so issue them concurrently over the pooled session
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        status_future = executor.submit(client.get_session_status, session_token)
+        rate_limit_future = executor.submit(client.get_rate_limit_status, session_token)
+        stats_future = executor.submit(client.get_stats)
+    
     # Step 6: Check session status
-    print("\n6. Checking session status...")
-    status_response, status_code = client.get_session_status(session_token)
+    status_response, status_code = status_future.result()
     
     if status_code == 200:
         session = status_response['session']
-        print(f"✅ Session status retrieved")
-        print(f"   Is Verified: {session['is_verified']}")
-        print(f"   Attempts: {session['verification_attempts']}/{session['max_attempts']}")
+        _report("\n6. Checking session status...",
+                f"✅ Session status retrieved",
+                f"   Is Verified: {session['is_verified']}",
+                f"   Attempts: {session['verification_attempts']}/{session['max_attempts']}")
     else:
-        print(f"❌ Failed to get session status: {status_response}")
+        _report("\n6. Checking session status...",
+                f"❌ Failed to get session status: {status_response}")
     
     # Step 6.5: Check rate limit status
-    print("\n6.5. Checking rate limit status...")
-    rate_limit_response, status_code = client.get_rate_limit_status(session_token)
+    rate_limit_response, status_code = rate_limit_future.result()
     
     if status_code == 200:
         rate_limit = rate_limit_response['rate_limit_status']
-        print(f"✅ Rate limit status retrieved")
-        print(f"   Is Rate Limited: {rate_limit['is_rate_limited']}")
-        print(f"   Failed Attempts Used: {rate_limit['failed_attempts_used']}/{rate_limit['max_failed_attempts_per_hour']}")
-        print(f"   Remaining Failed Attempts: {rate_limit['remaining_failed_attempts']}")
-        print(f"   Note: {rate_limit['note']}")
+        lines = ["\n6.5. Checking rate limit status...",
+                 f"✅ Rate limit status retrieved",
+                 f"   Is Rate Limited: {rate_limit['is_rate_limited']}",
+                 f"   Failed Attempts Used: {rate_limit['failed_attempts_used']}/{rate_limit['max_failed_attempts_per_hour']}",
+                 f"   Remaining Failed Attempts: {rate_limit['remaining_failed_attempts']}",
+                 f"   Note: {rate_limit['note']}"]
         if rate_limit['reset_time']:
-            print(f"   Reset Time: {rate_limit['reset_time']}")
+            lines.append(f"   Reset Time: {rate_limit['reset_time']}")
+        _report(*lines)
     else:
-        print(f"❌ Failed to get rate limit status: {rate_limit_response}")
+        _report("\n6.5. Checking rate limit status...",
+                f"❌ Failed to get rate limit status: {rate_limit_response}")
     
     # Step 7: Get server statistics
-    print("\n7. Getting server statistics...")
-    stats_response, status_code = client.get_stats()
+    stats_response, status_code = stats_future.result()
     
     if status_code == 200:
         stats = stats_response['stats']
-        print(f"✅ Server statistics:")
-        print(f"   Total Files: {stats['total_challenge_data_files']}")
-        print(f"   Used Files: {stats['used_challenge_data_files']}")
-        print(f"   Available Files: {stats['available_challenge_data_files']}")
-        print(f"   Active Sessions: {stats['active_authentication_sessions']}")
-        print(f"   Total Attempts: {stats['total_verification_attempts']}")
-        print(f"   Success Rate: {stats['success_rate']:.2f}%")
+        lines = ["\n7. Getting server statistics...",
+                 f"✅ Server statistics:",
+                 f"   Total Files: {stats['total_challenge_data_files']}",
+                 f"   Used Files: {stats['used_challenge_data_files']}",
+                 f"   Available Files: {stats['available_challenge_data_files']}",
+                 f"   Active Sessions: {stats['active_authentication_sessions']}",
+                 f"   Total Attempts: {stats['total_verification_attempts']}",
+                 f"   Success Rate: {stats['success_rate']:.2f}%"]
         if 'rate_limiting' in stats:
             rate_limiting = stats['rate_limiting']
-            print(f"   Rate Limiting:")
-            print(f"     Max Failed Per Hour Per User: {rate_limiting['max_failed_attempts_per_hour_per_user']}")
-            print(f"     Recent Total Attempts (1h): {rate_limiting['recent_total_attempts_last_hour']}")
-            print(f"     Recent Failed Attempts (1h): {rate_limiting['recent_failed_attempts_last_hour']}")
-            print(f"     Note: {rate_limiting['note']}")
+            lines += [f"   Rate Limiting:",
+                      f"     Max Failed Per Hour Per User: {rate_limiting['max_failed_attempts_per_hour_per_user']}",
+                      f"     Recent Total Attempts (1h): {rate_limiting['recent_total_attempts_last_hour']}",
+                      f"     Recent Failed Attempts (1h): {rate_limiting['recent_failed_attempts_last_hour']}",
+                      f"     Note: {rate_limiting['note']}"]
+        _report(*lines)
     else:
-        print(f"❌ Failed to get server statistics: {stats_response}")
+        _report("\n7. Getting server statistics...",
+                f"❌ Failed to get server statistics: {stats_response}")
     
-    print("\n" + "=" * 80)
-    print("DEMO COMPLETED SUCCESSFULLY!")
-    print("=" * 80)
+    _report("\n" + "=" * 80, "DEMO COMPLETED SUCCESSFULLY!", "=" * 80)
 
 def demo_wrong_sequence():
     """Demonstrate verification with wrong sequence."""
-    print("\n" + "=" * 80)
-    print("DEMONSTRATING WRONG SEQUENCE VERIFICATION")
-    print("=" * 80)
+    _report("\n" + "=" * 80, "DEMONSTRATING WRONG SEQUENCE VERIFICATION", "=" * 80)
     
     client = MysteryServerClient()
     
     # Step 1: First create and upload a new challenge data file
-    print("\n1. Creating and uploading new challenge data for wrong sequence test...")
-    protocol = MysteryProtocol()
+    protocol = client.protocol
     secret_string = "WrongTest"  # Different secret for this test
     segments = 4
     
     # Generate keys
-    verifier_keys, owner_keys = protocol.provision_keys()
+    verifier_keys, owner_keys = _shared_keys()
     
     # Generate prize and mappings
     prize_data = protocol.generate_prize(owner_keys['public_context'])
@@ -337,28 +491,28 @@ def demo_wrong_sequence():
     )
     
     if status_code == 201:
-        print(f"✅ Challenge data uploaded successfully for wrong sequence test")
+        _report("\n1. Creating and uploading new challenge data for wrong sequence test...",
+                f"✅ Challenge data uploaded successfully for wrong sequence test")
     else:
-        print(f"❌ Failed to upload challenge data: {response}")
+        _report("\n1. Creating and uploading new challenge data for wrong sequence test...",
+                f"❌ Failed to upload challenge data: {response}")
         return
     
     # Step 2: Get authentication challenge
-    print("\n2. Getting authentication challenge...")
     challenge_response, status_code = client.get_authentication_challenge(user_id, key_name, timeout_minutes=5)
     
     if status_code != 200:
-        print(f"❌ No authentication challenge available: {challenge_response}")
+        _report("\n2. Getting authentication challenge...",
+                f"❌ No authentication challenge available: {challenge_response}")
         return
     
     session_token = challenge_response['session_token']
-    print(f"✅ Got authentication challenge: {session_token}")
+    _report("\n2. Getting authentication challenge...",
+            f"✅ Got authentication challenge: {session_token}")
     
     # Step 3: Use wrong sequence (values within valid segment range 1-segments)
-    print("\n3. Testing with wrong sequence...")
     # Generate random wrong sequence with valid segment numbers (1 to segments) but incorrect for the secret
-    import random
-    wrong_sequence = [random.randint(1, segments) for _ in range(len(secret_string))]
-    print(f"   Using wrong sequence: {wrong_sequence}")
+    wrong_sequence = random.choices(range(1, segments + 1), k=len(secret_string))
     
     # Step 4: Try to verify with wrong sequence
     verify_response, status_code = client.verify_solution(
@@ -369,22 +523,24 @@ def demo_wrong_sequence():
     
     if status_code == 200:
         result = verify_response['verification_result']
-        print(f"✅ Verification completed (expected to fail)")
-        print(f"   Match: {result['is_match']}")
-        print(f"   Prize Value: {result['prize_value']}")
-        print(f"   Message: {verify_response['message']}")
+        _report("\n3. Testing with wrong sequence...",
+                f"   Using wrong sequence: {wrong_sequence}",
+                f"✅ Verification completed (expected to fail)",
+                f"   Match: {result['is_match']}",
+                f"   Prize Value: {result['prize_value']}",
+                f"   Message: {verify_response['message']}")
     else:
-        print(f"❌ Verification request failed: {verify_response}")
+        _report("\n3. Testing with wrong sequence...",
+                f"   Using wrong sequence: {wrong_sequence}",
+                f"❌ Verification request failed: {verify_response}")
     
-    print("\n" + "=" * 80)
-    print("WRONG SEQUENCE DEMO COMPLETED!")
-    print("=" * 80)
+    _report("\n" + "=" * 80, "WRONG SEQUENCE DEMO COMPLETED!", "=" * 80)
 
 if __name__ == "__main__":
     try:
         demo_complete_workflow()
         demo_wrong_sequence()
     except requests.exceptions.ConnectionError:
-        print("❌ Could not connect to server. Make sure the server is running at http://localhost:1776")
+        _report("❌ Could not connect to server. Make sure the server is running at http://localhost:1776")
     except Exception as e:
-        print(f"❌ Demo failed with error: {e}") 
+        _report(f"❌ Demo failed with error: {e}") 
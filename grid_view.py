@@ -9,14 +9,17 @@ import sys
 import tty
 import time
 import termios
+import contextlib
 import itertools
-import random
+import operator
 import secrets
 import string
 from typing import List, Dict, Any, Optional, Tuple
 from collections import defaultdict
 
 # Third-party imports
+import numpy as np
+
 try:
     from rich.console import Console
     from rich.table import Table
@@ -43,11 +46,58 @@ def get_char():
     return char
 
 
+@contextlib.contextmanager
+def raw_terminal():
+    """Keep stdin in raw mode for the duration of the block.
+    
+    Output post-processing stays enabled so redraws written while in raw mode
+    still translate newlines. Does nothing when stdin is not a terminal.
+    """
+    if not sys.stdin.isatty():
+        yield
+        return
+    
+    fd = sys.stdin.fileno()
+    old_settings = termios.tcgetattr(fd)
+    try:
+        tty.setraw(fd)
+        mode = termios.tcgetattr(fd)
+        mode[tty.OFLAG] |= termios.OPOST
+        termios.tcsetattr(fd, termios.TCSANOW, mode)
+        yield
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
+
+
+# All 24 orderings of the four symbols, sorted once so permutation indices are stable
+_SORTED_PERMS = tuple(sorted(itertools.permutations((1, 2, 3, 4))))
+_SYMBOLS = ("○", "X", "▲", "■")
+_SYMBOL_ORDER_TABLE = tuple(tuple(_SYMBOLS[num - 1] for num in perm) for perm in _SORTED_PERMS)
+_SYMBOL_TO_SEGMENT_TABLE = tuple(dict(zip(_SYMBOLS, perm)) for perm in _SORTED_PERMS)
+_SEGMENT_TO_SYMBOL_TABLE = tuple(dict(zip(perm, _SYMBOLS)) for perm in _SORTED_PERMS)
+# J K L ; (either case) map to symbols in display order, keyed by the raw byte read from stdin
+_KEY_BYTES = ((b'j', b'J'), (b'k', b'K'), (b'l', b'L'), (b';',))
+_KEY_TO_SYMBOL_TABLE = tuple({key: symbol for keys, symbol in zip(_KEY_BYTES, order) for key in keys}
+                             for order in _SYMBOL_ORDER_TABLE)
+
+# Control keys as raw bytes
+_QUIT_KEYS = (b'q', b'Q')
+_FINISH_KEYS = (b'\r', b'\n', b'\x1b')  # Enter, LF, or Escape
+_DELETE_KEYS = (b'\x08', b'\x7f')  # Backspace or Delete
+_TOGGLE_KEYS = (b'm', b'M')
+
+# First 64 characters of the mystery protocol alphabet, split evenly across the 4 grid segments
+_GRID_ALPHABET = np.array(list((string.ascii_letters + string.digits + string.punctuation + " ")[:64]))
+_GRID_SEGMENT_SIZE = len(_GRID_ALPHABET) // 4
+assert len(_GRID_ALPHABET) == 64
+
+
 class MysteryGridDisplay:
     """Display character mappings in a 2x2 grid format using Rich library."""
     
     # Symbol to represent space character
     SPACE_SYMBOL = "◦"
+    _SPACE_TRANS = str.maketrans({" ": SPACE_SYMBOL})
     
     # Symbol mapping for permutation ordering
     SYMBOL_MAP = {
@@ -57,6 +107,25 @@ class MysteryGridDisplay:
         4: "■"   # Square
     }
     
+    # Synchronized-update frame brackets: hold rendering, home the cursor and erase below it,
+    # then release once the whole frame has been written (flicker-free repaint)
+    FRAME_BEGIN = "\x1b[?2026h\x1b[H\x1b[J"
+    FRAME_END = "\x1b[?2026l"
+    
+    # Display color for each symbol
+    SYMBOL_COLORS = {
+        "○": "bright_cyan",
+        "X": "bright_yellow", 
+        "▲": "bright_green",
+        "■": "bright_orange"
+    }
+    
+    # Characters per grid cell line are laid out within this width (char + space each)
+    SEGMENT_LINE_WIDTH = 20
+    
+    # Pre-formatted Rich markup for each colored symbol
+    SYMBOL_MARKUP = {symbol: f"[{color}]{symbol}[/{color}]" for symbol, color in SYMBOL_COLORS.items()}
+    
     def __init__(self, console: Optional[Console] = None, permutation_index: int = 1, mapping_permutation_index: int = 1):
         """Initialize grid display with Rich console.
         
@@ -73,7 +142,18 @@ class MysteryGridDisplay:
         self.mapping_permutation_index = mapping_permutation_index
         self.symbol_order = self._get_symbol_order(permutation_index)
         self.symbol_to_segment_map = self._get_symbol_to_segment_mapping(mapping_permutation_index)
+        # Key and reverse segment lookups come straight from the precomputed tables (indices validated above)
+        self._key_to_symbol = _KEY_TO_SYMBOL_TABLE[permutation_index - 1]
+        self._segment_to_symbol = _SEGMENT_TO_SYMBOL_TABLE[mapping_permutation_index - 1]
+        # Mapping line shown by the 'M' toggle, in segment number order (1, 2, 3, 4)
+        self._mapping_display = " | ".join(
+            f"[bold white]{segment_num}[/bold white] → {self.SYMBOL_MARKUP[self._segment_to_symbol[segment_num]]}"
+            for segment_num in (1, 2, 3, 4) if segment_num in self._segment_to_symbol
+        )
         self.show_mapping = False  # Toggle for showing/hiding mapping
+        self._parsed_cache: Dict[int, Dict[int, List[str]]] = {}  # Parsed segments per position
+        self._grid_cache: Dict[int, Table] = {}  # Rendered grid table per position
+        self._legend_renderable = self._build_legend_table()  # Symbol order is fixed per instance
         
     def _get_symbol_order(self, permutation_index: int) -> Tuple[str, str, str, str]:
         """Get symbol order based on permutation index.
@@ -84,24 +164,11 @@ class MysteryGridDisplay:
         Returns:
             Tuple of symbols in the specified permutation order
         """
-        # Base elements for permutation
-        elements = [1, 2, 3, 4]
-        
-        # Calculate all permutations and sort them
-        permutations = list(itertools.permutations(elements))
-        permutations.sort()
-        
         # Validate permutation index
-        if permutation_index < 1 or permutation_index > len(permutations):
-            raise ValueError(f"Permutation index must be between 1 and {len(permutations)}")
-        
-        # Get the specific permutation (convert to 0-based index)
-        selected_permutation = permutations[permutation_index - 1]
+        if not 1 <= permutation_index <= len(_SORTED_PERMS):
+            raise ValueError(f"Permutation index must be between 1 and {len(_SORTED_PERMS)}")
         
-        # Map numbers to symbols
-        symbol_order = tuple(self.SYMBOL_MAP[num] for num in selected_permutation)
-        
-        return symbol_order
+        return _SYMBOL_ORDER_TABLE[permutation_index - 1]
         
     def _get_symbol_to_segment_mapping(self, mapping_permutation_index: int) -> Dict[str, int]:
         """Get symbol-to-segment mapping based on mapping permutation index.
@@ -112,37 +179,18 @@ class MysteryGridDisplay:
         Returns:
             Dictionary mapping symbols to segment numbers
         """
-        # Base elements for permutation
-        elements = [1, 2, 3, 4]
-        
-        # Calculate all permutations and sort them
-        permutations = list(itertools.permutations(elements))
-        permutations.sort()
-        
         # Validate permutation index
-        if mapping_permutation_index < 1 or mapping_permutation_index > len(permutations):
-            raise ValueError(f"Mapping permutation index must be between 1 and {len(permutations)}")
-        
-        # Get the specific permutation (convert to 0-based index)
-        selected_permutation = permutations[mapping_permutation_index - 1]
+        if not 1 <= mapping_permutation_index <= len(_SORTED_PERMS):
+            raise ValueError(f"Mapping permutation index must be between 1 and {len(_SORTED_PERMS)}")
         
-        # Create mapping from symbols to segment numbers
-        symbol_to_segment = {}
-        for i, symbol in enumerate(["○", "X", "▲", "■"]):
-            symbol_to_segment[symbol] = selected_permutation[i]
-        
-        return symbol_to_segment
+        # Copy so callers can't mutate the shared table
+        return dict(_SYMBOL_TO_SEGMENT_TABLE[mapping_permutation_index - 1])
         
     def show_all_permutations(self) -> None:
         """Display all possible symbol permutations for reference."""
-        elements = [1, 2, 3, 4]
-        permutations = list(itertools.permutations(elements))
-        permutations.sort()
-        
         self.console.print("[bold blue]All Symbol Permutations:[/bold blue]")
         
-        for i, perm in enumerate(permutations, 1):
-            symbol_order = tuple(self.SYMBOL_MAP[num] for num in perm)
+        for i, (perm, symbol_order) in enumerate(zip(_SORTED_PERMS, _SYMBOL_ORDER_TABLE), 1):
             self.console.print(f"[dim]Permutation {i:2d}:[/dim] {symbol_order} [dim]({perm})[/dim]")
         
         self.console.print()
@@ -156,21 +204,12 @@ class MysteryGridDisplay:
         Returns:
             Dictionary mapping segment numbers to sorted character lists
         """
-        segments = defaultdict(list)
-        
-        for mapping in mapping_data:
-            char = mapping['character']
-            segment = mapping['segment']
-            
-            # Replace space with symbol
-            display_char = self.SPACE_SYMBOL if char == ' ' else char
-            segments[segment].append(display_char)
-        
-        # Sort characters in each segment
-        for segment in segments:
-            segments[segment].sort()
-            
-        return dict(segments)
+        # One sort by (segment, character), with spaces replaced by the space symbol,
+        # then group consecutive entries by segment
+        items = sorted((mapping['segment'], mapping['character'].translate(self._SPACE_TRANS))
+                       for mapping in mapping_data)
+        return {segment: [char for _, char in group]
+                for segment, group in itertools.groupby(items, key=operator.itemgetter(0))}
     
     def _calculate_optimal_width(self, all_segments: Dict[int, List[str]]) -> int:
         """Calculate optimal width based on content.
@@ -209,25 +248,9 @@ class MysteryGridDisplay:
         elif max_width is None:
             max_width = 20
         
-        # Group characters with spacing
-        char_groups = []
-        current_line = []
-        current_width = 0
-        
-        for char in characters:
-            # Each character takes 2 spaces (char + space)
-            if current_width + 2 > max_width and current_line:
-                char_groups.append(" ".join(current_line))
-                current_line = [char]
-                current_width = 2
-            else:
-                current_line.append(char)
-                current_width += 2
-        
-        if current_line:
-            char_groups.append(" ".join(current_line))
-        
-        return "\n".join(char_groups)
+        # Each character takes 2 spaces (char + space), with at least one character per line
+        per_line = max(1, max_width // 2)
+        return "\n".join(" ".join(characters[i:i + per_line]) for i in range(0, len(characters), per_line))
     
     def display_mapping_grid(self, mapping_data_sets: List[List[Dict[str, Any]]], 
                            title: Optional[str] = None) -> List[int]:
@@ -243,101 +266,92 @@ class MysteryGridDisplay:
         if not mapping_data_sets:
             raise ValueError("At least one mapping dataset is required")
         
-        # Clear screen at program start
-        self.console.clear()
+        # Parsed segments and grid tables are cached per position for this set of mappings
+        self._parsed_cache.clear()
+        self._grid_cache.clear()
         
-        # Validate that we have proper segment data
-        for mapping_data in mapping_data_sets:
-            if len(set(m['segment'] for m in mapping_data)) != 4:
-                raise ValueError("Grid display requires exactly 4 segments")
+        # Validate that we have proper segment data; streamed mappings are generated
+        # with 4 segments by construction and are not forced up front
+        if not isinstance(mapping_data_sets, MappingStream):
+            for mapping_data in mapping_data_sets:
+                if len(set(m['segment'] for m in mapping_data)) != 4:
+                    raise ValueError("Grid display requires exactly 4 segments")
         
         # Interactive segment entry with grid updates
         accumulated_symbols = []
         accumulated_segments = []
         current_position = 0
         
-        # Initial display
-        self._draw_interface(mapping_data_sets, accumulated_symbols, accumulated_segments, current_position)
-        
-        while current_position < len(mapping_data_sets):
-            # Get immediate character input
-            try:
-                char = get_char()
-                
-                # Clear screen and redraw interface
-                self.console.clear()
-                self._draw_interface(mapping_data_sets, accumulated_symbols, accumulated_segments, current_position)
-                
-                # Check for quit
-                if char.lower() == 'q':
-                    self.console.print("\n[yellow]Quit requested.[/yellow]")
-                    break
-                
-                # Check for escape/enter to finish
-                if ord(char) in [13, 10, 27]:  # Enter, LF, or Escape
-                    self.console.print("\n[yellow]Finished entering symbols.[/yellow]")
-                    break
-                
-                # Check for delete/backspace to go back
-                if ord(char) in [8, 127]:  # Backspace or Delete
-                    if accumulated_symbols and current_position > 0:
-                        removed_symbol = accumulated_symbols.pop()
-                        removed_segment = accumulated_segments.pop()
-                        current_position -= 1
-                        
-                        # Clear and redraw at previous position
-                        self.console.clear()
-                        self._draw_interface(mapping_data_sets, accumulated_symbols, accumulated_segments, current_position)
-                    else:
-                        # Clear and redraw with error message
-                        self.console.clear()
-                        self._draw_interface(mapping_data_sets, accumulated_symbols, accumulated_segments, current_position, error_msg="✗ Nothing to delete")
-                    continue
-                
-                # Check for mapping toggle
-                if char.lower() == 'm':
-                    self.show_mapping = not self.show_mapping
+        # Initial display, clearing the screen at program start
+        self._draw_interface(mapping_data_sets, accumulated_symbols, accumulated_segments, current_position, clear=True)
+        
+        # Enter raw mode once for the whole entry loop rather than per keystroke
+        with raw_terminal():
+            while current_position < len(mapping_data_sets):
+                # Get immediate character input
+                try:
+                    key = sys.stdin.buffer.read1(1)
+                    if not key:
+                        raise EOFError
                     
-                    # Clear and redraw with mapping toggle
-                    self.console.clear()
-                    self._draw_interface(mapping_data_sets, accumulated_symbols, accumulated_segments, current_position)
-                    continue
-                
-                # Create letter to symbol mapping (J K L ; map to symbols in display order)
-                letter_to_symbol = {
-                    'J': self.symbol_order[0],
-                    'K': self.symbol_order[1], 
-                    'L': self.symbol_order[2],
-                    ';': self.symbol_order[3]
-                }
-                
-                # Validate and process input
-                if char.upper() in ['J', 'K', 'L'] or char == ';':
-                    key = char.upper() if char != ';' else ';'
-                    symbol = letter_to_symbol[key]
-                    segment_num = self.symbol_to_segment_map[symbol]
+                    # Check for quit
+                    if key in _QUIT_KEYS:
+                        self._draw_interface(mapping_data_sets, accumulated_symbols, accumulated_segments, current_position, clear=True)
+                        self.console.print("\n[yellow]Quit requested.[/yellow]")
+                        break
+                    
+                    # Check for escape/enter to finish
+                    if key in _FINISH_KEYS:
+                        self._draw_interface(mapping_data_sets, accumulated_symbols, accumulated_segments, current_position, clear=True)
+                        self.console.print("\n[yellow]Finished entering symbols.[/yellow]")
+                        break
+                    
+                    # Check for delete/backspace to go back
+                    if key in _DELETE_KEYS:
+                        if accumulated_symbols and current_position > 0:
+                            removed_symbol = accumulated_symbols.pop()
+                            removed_segment = accumulated_segments.pop()
+                            current_position -= 1
+                            
+                            # Clear and redraw at previous position
+                            self._draw_interface(mapping_data_sets, accumulated_symbols, accumulated_segments, current_position, clear=True)
+                        else:
+                            # Grid is unchanged; only show the error message below it
+                            self._redraw_status(current_position, len(mapping_data_sets), error_msg="✗ Nothing to delete")
+                        continue
                     
-                    accumulated_symbols.append(symbol)
-                    accumulated_segments.append(segment_num)
-                    current_position += 1
+                    # Check for mapping toggle
+                    if key in _TOGGLE_KEYS:
+                        self.show_mapping = not self.show_mapping
+                        
+                        # Clear and redraw with mapping toggle
+                        self._draw_interface(mapping_data_sets, accumulated_symbols, accumulated_segments, current_position, clear=True)
+                        continue
                     
-                    # Clear and redraw with updated sequence
+                    # Validate and process input
+                    symbol = self._key_to_symbol.get(key)
+                    if symbol is not None:
+                        segment_num = self.symbol_to_segment_map[symbol]
+                        
+                        accumulated_symbols.append(symbol)
+                        accumulated_segments.append(segment_num)
+                        current_position += 1
+                        
+                        # Clear and redraw with updated sequence
+                        self._draw_interface(mapping_data_sets, accumulated_symbols, accumulated_segments, current_position, clear=True)
+                    else:
+                        # Grid is unchanged; only show the error message below it
+                        self._redraw_status(current_position, len(mapping_data_sets), error_msg=f"✗ Invalid input '{key.decode('utf-8', 'replace')}'. Must be J/K/L/;, 'M' to toggle mapping, Backspace to delete, or 'Q' to quit.")
+                
+                except (KeyboardInterrupt, EOFError):
                     self.console.clear()
-                    self._draw_interface(mapping_data_sets, accumulated_symbols, accumulated_segments, current_position)
-                else:
-                    # Clear and redraw with error message
+                    self.console.print("[yellow]Input interrupted.[/yellow]")
+                    break
+                except Exception as e:
                     self.console.clear()
-                    self._draw_interface(mapping_data_sets, accumulated_symbols, accumulated_segments, current_position, error_msg=f"✗ Invalid input '{char}'. Must be J/K/L/;, 'M' to toggle mapping, Backspace to delete, or 'Q' to quit.")
-                    
-            except (KeyboardInterrupt, EOFError):
-                self.console.clear()
-                self.console.print("[yellow]Input interrupted.[/yellow]")
-                break
-            except Exception as e:
-                self.console.clear()
-                self.console.print(f"[red]Input error: {e}[/red]")
-                break
-        
+                    self.console.print(f"[red]Input error: {e}[/red]")
+                    break
+
         # Show final sequence after process is complete
         if accumulated_symbols:
             self.console.print(f"\n[bold green]Final symbols:[/bold green] {accumulated_symbols}")
@@ -348,115 +362,115 @@ class MysteryGridDisplay:
         # Return the sequence of segment numbers entered by the user
         return accumulated_segments
     
+    def _build_grid_table(self, current_segments: Dict[int, List[str]]) -> Table:
+        """Build the 2x2 segment grid for one position.
+        
+        Args:
+            current_segments: Parsed segments for the position
+            
+        Returns:
+            Rich Table containing one panel per segment
+        """
+        table = Table(
+            show_header=False,
+            box=box.HEAVY,
+            padding=(0, 0)
+        )
+        
+        table.add_column(justify="center", style="cyan", width=25)
+        table.add_column(justify="center", style="cyan", width=25)
+        
+        # Create a panel for each segment; the line width is fixed to fit the 25-wide columns,
+        # so no per-segment width calculation is needed
+        panels = []
+        for segment_num in (1, 2, 3, 4):
+            seg_chars = self._format_segment_characters(current_segments.get(segment_num, []), self.SEGMENT_LINE_WIDTH)
+            panels.append(Panel(seg_chars, title=f"[bold yellow]Segment {segment_num}[/bold yellow]", border_style="green", padding=(0, 0)))
+        
+        # Add rows
+        table.add_row(panels[0], panels[1])
+        table.add_row(panels[2], panels[3])
+        return table
+    
+    def _build_legend_table(self) -> Table:
+        """Build the symbol legend shown below the grid, in display permutation order."""
+        legend_table = Table(
+            show_header=False,
+            box=None,
+            padding=(0, 1),
+            show_edge=False
+        )
+        
+        # Add 4 columns for the legend with small fixed width
+        for _ in range(4):
+            legend_table.add_column(justify="center", width=6)
+        
+        # Show only symbols in legend, each in a bordered panel
+        self._legend_panels = tuple(Panel(self.SYMBOL_MARKUP[symbol], width=5, padding=(0, 1))
+                                    for symbol in self.symbol_order)
+        legend_table.add_row(*self._legend_panels)
+        return legend_table
+    
     def _draw_interface(self, mapping_data_sets: List[List[Dict[str, Any]]], 
                        accumulated_symbols: List[str], accumulated_segments: List[int], current_position: int,
-                       show_input: bool = False, success_msg: str = None, error_msg: str = None) -> None:
-        """Draw the complete interface including grid, symbols, segments, and prompts."""
+                       show_input: bool = False, success_msg: str = None, error_msg: str = None,
+                       clear: bool = False) -> None:
+        """Draw the complete interface including grid, symbols, segments, and prompts.
         
+        The frame is rendered into a capture buffer and written to the terminal in one
+        write. With clear=True the frame repaints the screen from the top inside a
+        synchronized update instead of erasing the whole screen first.
+        """
+        with self.console.capture() as capture:
+            self._render_interface(mapping_data_sets, accumulated_symbols, accumulated_segments, current_position)
+        body = capture.get()
+        
+        with self.console.capture() as capture:
+            self._render_status(current_position, len(mapping_data_sets), success_msg, error_msg)
+        status = capture.get()
+        self._status_lines = status.count("\n")
+        
+        frame = body + status
+        if clear and self.console.is_terminal:
+            frame = self.FRAME_BEGIN + frame + self.FRAME_END
+        self.console.file.write(frame)
+        self.console.file.flush()
+    
+    def _render_interface(self, mapping_data_sets: List[List[Dict[str, Any]]], 
+                          accumulated_symbols: List[str], accumulated_segments: List[int], current_position: int) -> None:
+        """Print the grid, legend, mapping and symbols of one frame to the console."""
         if current_position < len(mapping_data_sets):
             self.console.print(f"\n[bold blue]═══ Mystery Protocol ═══[/bold blue]")
             
-            # Display the current mapping grid
-            current_mapping = mapping_data_sets[current_position]
-            current_segments = self._parse_mapping_data(current_mapping)
-            
-            # Create updated table for current position
-            table = Table(
-                show_header=False,
-                box=box.HEAVY,
-                padding=(0, 0)
-            )
-            
-            table.add_column(justify="center", style="cyan", width=25)
-            table.add_column(justify="center", style="cyan", width=25)
-            
-            # Create content for each segment (using current position mapping)
-            seg1_chars = self._format_segment_characters(current_segments.get(1, []), 20, current_segments)
-            seg2_chars = self._format_segment_characters(current_segments.get(2, []), 20, current_segments)
-            seg3_chars = self._format_segment_characters(current_segments.get(3, []), 20, current_segments)
-            seg4_chars = self._format_segment_characters(current_segments.get(4, []), 20, current_segments)
-            
-            # Create panels for each segment
-            seg1_panel = Panel(seg1_chars, title="[bold yellow]Segment 1[/bold yellow]", border_style="green", padding=(0, 0))
-            seg2_panel = Panel(seg2_chars, title="[bold yellow]Segment 2[/bold yellow]", border_style="green", padding=(0, 0))
-            seg3_panel = Panel(seg3_chars, title="[bold yellow]Segment 3[/bold yellow]", border_style="green", padding=(0, 0))
-            seg4_panel = Panel(seg4_chars, title="[bold yellow]Segment 4[/bold yellow]", border_style="green", padding=(0, 0))
+            # Display the current mapping grid, building it only the first time this position is shown
+            table = self._grid_cache.get(current_position)
+            if table is None:
+                current_segments = self._parsed_cache.get(current_position)
+                if current_segments is None:
+                    current_segments = self._parse_mapping_data(mapping_data_sets[current_position])
+                    self._parsed_cache[current_position] = current_segments
+                table = self._build_grid_table(current_segments)
+                self._grid_cache[current_position] = table
             
-            # Add rows
-            table.add_row(seg1_panel, seg2_panel)
-            table.add_row(seg3_panel, seg4_panel)
-            
-            # Display the updated table
             self.console.print(table)
             
-            # Add legend row below the main table
-            legend_table = Table(
-                show_header=False,
-                box=None,
-                padding=(0, 1),
-                show_edge=False
-            )
-            
-            # Add 4 columns for the legend with small fixed width
-            legend_table.add_column(justify="center", width=6)
-            legend_table.add_column(justify="center", width=6)
-            legend_table.add_column(justify="center", width=6)
-            legend_table.add_column(justify="center", width=6)
-            
-            # Create bordered panels for each character using permutation order
-            color_map = {
-                "○": "bright_cyan",
-                "X": "bright_yellow", 
-                "▲": "bright_green",
-                "■": "bright_orange"
-            }
-            
-            # Show only symbols in legend
-            panels = []
-            for i in range(4):
-                symbol = self.symbol_order[i]
-                panel_content = f"[{color_map[symbol]}]{symbol}[/{color_map[symbol]}]"
-                panels.append(Panel(panel_content, width=5, padding=(0, 1)))
-            
-            # Add the legend row
-            legend_table.add_row(*panels)
-            
-            self.console.print(legend_table)
+            # Legend row below the main table
+            self.console.print(self._legend_renderable)
             
             # Show mapping if enabled
             if self.show_mapping:
                 self.console.print()
-                # Create reverse mapping (segment number to symbol)
-                segment_to_symbol = {v: k for k, v in self.symbol_to_segment_map.items()}
-                
-                # Display mapping in number order (1, 2, 3, 4)
-                mapping_text = []
-                for segment_num in [1, 2, 3, 4]:
-                    if segment_num in segment_to_symbol:
-                        symbol = segment_to_symbol[segment_num]
-                        color = color_map[symbol]
-                        mapping_text.append(f"[bold white]{segment_num}[/bold white] → [{color}]{symbol}[/{color}]")
-                
-                mapping_display = " | ".join(mapping_text)
-                self.console.print(f"[dim]Mapping: {mapping_display}[/dim]")
+                self.console.print(f"[dim]Mapping: {self._mapping_display}[/dim]")
         
         # Always show accumulated symbols
         if accumulated_symbols:
             # Create colored symbol display with no spaces
-            color_map = {
-                "○": "bright_cyan",
-                "X": "bright_yellow", 
-                "▲": "bright_green",
-                "■": "bright_orange"
-            }
-            
-            colored_symbols = []
-            for symbol in accumulated_symbols:
-                colored_symbols.append(f"[{color_map[symbol]}]{symbol}[/{color_map[symbol]}]")
-            
-            symbols_display = "".join(colored_symbols)
+            symbols_display = "".join(self.SYMBOL_MARKUP[symbol] for symbol in accumulated_symbols)
             self.console.print(f"\n[bold white]Symbols: {symbols_display}[/bold white]")
-        
+    
+    def _render_status(self, current_position: int, num_positions: int,
+                       success_msg: str = None, error_msg: str = None) -> None:
+        """Print the status message and input prompt at the bottom of a frame."""
         # Show status messages
         if success_msg:
             self.console.print(f"[green]{success_msg}[/green]")
@@ -464,9 +478,26 @@ class MysteryGridDisplay:
             self.console.print(f"[red]{error_msg}[/red]")
         
         # Show input prompt
-        if current_position < len(mapping_data_sets):
+        if current_position < num_positions:
             self.console.print(f"\n[bold cyan]Enter key for position {current_position + 1} (J/K/L/;, M to toggle mapping, Backspace to delete, Q to quit): [/bold cyan]", end="")
+    
+    def _redraw_status(self, current_position: int, num_positions: int, error_msg: str = None) -> None:
+        """Rewrite only the status and prompt lines below the frame already on screen.
+        
+        Used when a key leaves the grid unchanged: the cursor moves back to the start of
+        the previous status block, which is erased and rendered again in one write.
+        """
+        with self.console.capture() as capture:
+            self._render_status(current_position, num_positions, error_msg=error_msg)
+        status = capture.get()
         
+        if self.console.is_terminal:
+            cursor_up = f"\x1b[{self._status_lines}A" if self._status_lines else ""
+            self.console.file.write(cursor_up + "\r\x1b[J" + status)
+        else:
+            self.console.file.write(status)
+        self.console.file.flush()
+        self._status_lines = status.count("\n")
 
     
     def _display_statistics(self, segments: Dict[int, List[str]]) -> None:
@@ -525,6 +556,37 @@ class MysteryGridDisplay:
         self.console.print(summary_panel)
     
 
+def _mapping_rng(seed: Optional[int] = None) -> np.random.Generator:
+    """Create the generator for mapping generation.
+    
+    A fixed seed gives reproducible results; otherwise entropy is drawn once (128 bits
+    from the secrets module) and the generator produces every shuffle for all positions.
+    """
+    return np.random.default_rng(seed if seed is not None else secrets.randbits(128))
+
+
+def generate_position_mapping(rng: np.random.Generator) -> List[Dict[str, Any]]:
+    """Generate the random character mapping for a single position.
+    
+    Args:
+        rng: NumPy generator supplying the shuffles
+        
+    Returns:
+        List of 64 mapping dictionaries in mystery protocol format
+    """
+    # Shuffle alphabet and segment numbers 1-4 for this position
+    alphabet_shuffled = rng.permutation(_GRID_ALPHABET)
+    segment_numbers = rng.permutation(4) + 1
+    
+    # Consecutive runs of 16 shuffled characters form the 4 segments; then shuffle the final order
+    segments = np.repeat(segment_numbers, _GRID_SEGMENT_SIZE)
+    order = rng.permutation(len(alphabet_shuffled))
+    
+    # Create mapping dictionaries using exact mystery protocol format
+    return [{'character': char, 'segment': seg_num}
+            for char, seg_num in zip(alphabet_shuffled[order].tolist(), segments[order].tolist())]
+
+
 def generate_random_mapping(num_positions: int = 5, seed: Optional[int] = None) -> List[List[Dict[str, Any]]]:
     """Generate random character mappings for multiple positions using mystery protocol format.
     
@@ -533,87 +595,59 @@ def generate_random_mapping(num_positions: int = 5, seed: Optional[int] = None)
     
     Args:
         num_positions: Number of character positions to generate mappings for
-        seed: Random seed for reproducible results (optional)
+        seed: Random seed for reproducible results (optional). When omitted, the
+            generator is seeded once with 128 bits from the secrets module.
         
     Returns:
         List of mapping datasets, one for each character position
     """
-    if seed is not None:
-        random.seed(seed)
-        # Note: When seed is set, we use random for reproducibility
-        # When seed is None, we use secrets for cryptographic security
-    
-    # Use exact mystery protocol character set
-    full_alphabet = list(string.ascii_letters + string.digits + string.punctuation + " ")
-    
-    # Always use exactly 64 characters for consistency
-    if len(full_alphabet) >= 64:
-        # Take first 64 characters from the mystery protocol alphabet
-        alphabet = full_alphabet[:64]
-    else:
-        # If somehow less than 64, repeat characters to reach 64
-        alphabet = full_alphabet[:]
-        while len(alphabet) < 64:
-            alphabet.extend(full_alphabet[:min(64-len(alphabet), len(full_alphabet))])
-        alphabet = alphabet[:64]
-    
-    # Generate mappings for each position
-    mapping_data_sets = []
-    
-    for position in range(num_positions):
-        # Create a new random mapping for this position
-        position_mapping = []
-        
-        # Shuffle alphabet for this position
-        alphabet_shuffled = alphabet[:]
-        if seed is not None:
-            random.shuffle(alphabet_shuffled)
-        else:
-            # Use cryptographically secure shuffling
-            for i in range(len(alphabet_shuffled) - 1, 0, -1):
-                j = secrets.randbelow(i + 1)
-                alphabet_shuffled[i], alphabet_shuffled[j] = alphabet_shuffled[j], alphabet_shuffled[i]
-        
-        # Generate segment numbers 1-4
-        segment_numbers = list(range(1, 5))
-        if seed is not None:
-            random.shuffle(segment_numbers)
-        else:
-            # Use cryptographically secure shuffling
-            for i in range(len(segment_numbers) - 1, 0, -1):
-                j = secrets.randbelow(i + 1)
-                segment_numbers[i], segment_numbers[j] = segment_numbers[j], segment_numbers[i]
-        
-        # Calculate partition size (each segment gets roughly equal characters)
-        partition_size = len(alphabet_shuffled) // 4
-        char_partitions = [alphabet_shuffled[j:j+partition_size] for j in range(0, len(alphabet_shuffled), partition_size)]
-        
-        # Handle remainder characters by distributing them to first partitions
-        remainder_chars = alphabet_shuffled[len(char_partitions) * partition_size:]
-        for i, char in enumerate(remainder_chars):
-            if i < len(char_partitions):
-                char_partitions[i].append(char)
-        
-        # Create mapping dictionary using exact mystery protocol format
-        for seg_num, char_group in zip(segment_numbers, char_partitions):
-            for char in char_group:
-                position_mapping.append({
-                    'character': char,
-                    'segment': seg_num
-                })
-        
-        # Shuffle the final mapping order
-        if seed is not None:
-            random.shuffle(position_mapping)
-        else:
-            # Use cryptographically secure shuffling
-            for i in range(len(position_mapping) - 1, 0, -1):
-                j = secrets.randbelow(i + 1)
-                position_mapping[i], position_mapping[j] = position_mapping[j], position_mapping[i]
-        
-        mapping_data_sets.append(position_mapping)
+    rng = _mapping_rng(seed)
+    return [generate_position_mapping(rng) for _ in range(num_positions)]
+
+
+class MappingStream:
+    """Lazily generated sequence of position mappings.
+    
+    Indexes like the list returned by generate_random_mapping (and yields the same
+    mappings for the same seed), but each position is only generated the first time
+    it is needed, so an interactive display can show its first frame immediately.
+    """
     
-    return mapping_data_sets
+    def __init__(self, num_positions: int, seed: Optional[int] = None):
+        """Create a stream of mappings.
+        
+        Args:
+            num_positions: Number of character positions in the stream
+            seed: Random seed for reproducible results (optional)
+        """
+        self.num_positions = num_positions
+        self._rng = _mapping_rng(seed)
+        self._generated: List[List[Dict[str, Any]]] = []
+    
+    def __len__(self) -> int:
+        return self.num_positions
+    
+    def ensure(self, position: int) -> None:
+        """Generate mappings, in order, up to and including the given position."""
+        while len(self._generated) <= position:
+            self._generated.append(generate_position_mapping(self._rng))
+    
+    def __getitem__(self, position: int) -> List[Dict[str, Any]]:
+        if position < 0:
+            position += self.num_positions
+        if not 0 <= position < self.num_positions:
+            raise IndexError("mapping position out of range")
+        self.ensure(position)
+        return self._generated[position]
+    
+    def __iter__(self):
+        for position in range(self.num_positions):
+            yield self[position]
+    
+    def to_list(self) -> List[List[Dict[str, Any]]]:
+        """Generate any remaining positions and return all mappings as a list."""
+        self.ensure(self.num_positions - 1)
+        return list(self._generated)
 
 
 def display_mapping_details(mapping_data_sets: List[List[Dict[str, Any]]], position: int = 0) -> None:
@@ -707,8 +741,8 @@ def demo_grid_display():
     demo_seed = None  # Change to an integer for reproducible results
     num_positions = 64 
     
-    # Generate mappings silently
-    mapping_data_sets = generate_random_mapping(num_positions, seed=demo_seed)
+    # Generate mappings lazily, one position at a time as the user advances
+    mapping_data_sets = MappingStream(num_positions, seed=demo_seed)
     
     # Create display instance with permutation indices
     # Try different permutation indices (1-24) to see different symbol orders
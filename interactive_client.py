@@ -4,14 +4,17 @@ Interactive client for the Mystery Protocol Server.
 Uses MysteryGridDisplay for interactive verification sequence entry.
 """
 
-import requests
+import io
 import json
-import base64
+import urllib.parse
 import logging
 import uuid
 import bz2
+import zstandard as zstd
 import secrets
-from mystery_protocol import MysteryProtocol
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from mystery_protocol import MysteryProtocol, json_default
 from grid_view import MysteryGridDisplay, generate_random_mapping
 from rich.console import Console
 
@@ -19,42 +22,189 @@ from rich.console import Console
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Fast JSON serialization when available: orjson, then ujson, then the stdlib
+try:
+    import orjson
+    
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj, default=json_default)
+except ImportError:
+    try:
+        import ujson as _json
+    except ImportError:
+        _json = json
+    
+    def _json_dumps(obj) -> bytes:
+        # ensure_ascii output is pure ASCII, so skip the UTF-8 encoder
+        return _json.dumps(obj, ensure_ascii=True, default=json_default).encode('ascii')
+
+# zstd compressors are not safe to share between threads, so each thread gets its own
+_ZSTD_LOCAL = threading.local()
+
+def _zstd_compressor() -> zstd.ZstdCompressor:
+    """Return the calling thread's zstd compressor for challenge package uploads."""
+    cctx = getattr(_ZSTD_LOCAL, 'cctx', None)
+    if cctx is None:
+        cctx = _ZSTD_LOCAL.cctx = zstd.ZstdCompressor(level=3, threads=-1)
+    return cctx
+
+def _iter_json_chunks(obj):
+    """Yield the JSON encoding of obj one dict member or list element at a time.
+    
+    Keys are emitted in insertion order: the server only parses the package (its
+    uniqueness hash is over the compressed bytes), and owner_finalize_data builds
+    the package in a fixed key order, so no sorting pass is needed.
+    """
+    if isinstance(obj, dict) and obj:
+        separator = b'{'
+        for key, value in obj.items():
+            yield separator + _json_dumps(key) + b':'
+            yield from _iter_json_chunks(value)
+            separator = b','
+        yield b'}'
+    elif isinstance(obj, list) and obj:
+        separator = b'['
+        for item in obj:
+            yield separator
+            yield from _iter_json_chunks(item)
+            separator = b','
+        yield b']'
+    else:
+        yield _json_dumps(obj)
+
+class _ConcatBody:
+    """Read-only file-like view over several byte buffers, sent as one request body.
+    
+    requests takes Content-Length from __len__ and http.client streams the body
+    through read(), so the buffers are never joined into a single bytes object.
+    """
+    
+    def __init__(self, *parts):
+        self._parts = [memoryview(part) for part in parts]
+        self._length = sum(part.nbytes for part in self._parts)
+    
+    def __len__(self):
+        return self._length
+    
+    def read(self, size=-1):
+        if size is None or size < 0:
+            remaining, self._parts = self._parts, []
+            return b''.join(remaining)
+        # Short reads never cross a buffer boundary; callers loop until b''
+        while self._parts and not self._parts[0].nbytes:
+            self._parts.pop(0)
+        if not self._parts:
+            return b''
+        head = self._parts[0]
+        self._parts[0] = head[size:]
+        return bytes(head[:size])
+
+def _random_permutation_indices() -> tuple:
+    """Draw the display and mapping permutation indices (each 1-24) from one CSPRNG call."""
+    display_index, mapping_index = divmod(secrets.randbelow(24 * 24), 24)
+    return display_index + 1, mapping_index + 1
+
 class InteractiveMysteryClient:
     """Interactive client for Mystery Protocol Server using MysteryGridDisplay."""
     
-    def __init__(self, server_url: str = "http://localhost:1776"):
+    def __init__(self, server_url: str = "http://localhost:1776", compression: str = "zstd",
+                 timeout: tuple = (3.05, 30)):
+        """Create a client.
+        
+        Args:
+            server_url: Base URL of the Mystery Protocol Server
+            compression: Challenge package compression, "zstd" or legacy "bz2"
+            timeout: (connect, read) timeout in seconds applied to every request
+        """
+        if compression not in ("zstd", "bz2"):
+            raise ValueError(f"Unsupported compression: {compression}")
         self.server_url = server_url
+        self.compression = compression
+        self.timeout = timeout
         self.protocol = MysteryProtocol()
         self.console = Console()
         self._last_compressed_data = None
+        
+        # requests is imported here so offline practice mode never pays for it
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        # Reuse one keep-alive connection pool for every request to the server. Connection
+        # failures are retried for every method; gateway errors only for idempotent ones,
+        # since a retried POST could be recorded twice (e.g. as two verification attempts)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20,
+                              max_retries=Retry(total=2, backoff_factor=0.1,
+                                                status_forcelist=(502, 503, 504), raise_on_status=False))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+    
+    def close(self):
+        """Close the underlying HTTP session and its pooled connections."""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
     
     def submit_challenge_data(self, challenge_package: dict, unencrypted_mapping: list, user_id: str, key_name: str, key_index: int, segments: int = 10):
         """Submit challenge data file with unencrypted mapping to server."""
-        url = f"{self.server_url}/submit_challenge_data"
+        url = f"{self.server_url}/v2/submit_challenge_data"
         
-        # Compress the challenge package using bz2
-        json_str = json.dumps(challenge_package, sort_keys=True)
-        compressed = bz2.compress(json_str.encode('utf-8'))
+        # Compress the challenge package (the server detects zstd or bz2 from the data)
+        compressed = self._compress_package(challenge_package)
         
         # Store for statistics
         self._last_compressed_data = compressed
         
-        # Prepare multipart form data
-        files = {
-            'challenge_package_compressed': ('challenge_package.bz2', compressed, 'application/octet-stream')
-        }
-        
-        data = {
-            'unencrypted_mapping': json.dumps(unencrypted_mapping),
-            'user_id': user_id,
-            'key_name': key_name,
-            'key_index': str(key_index),
-            'segments': str(segments)
+        # The body is the compressed mapping followed by the compressed package; scalar fields go in headers
+        mapping_section = _zstd_compressor().compress(_json_dumps(unencrypted_mapping))
+        headers = {
+            'Content-Type': 'application/octet-stream',
+            'X-User-Id': user_id,
+            'X-Key-Name': urllib.parse.quote(key_name, safe=''),
+            'X-Key-Index': str(key_index),
+            'X-Segments': str(segments),
+            'X-Mapping-Length': str(len(mapping_section))
         }
         
-        response = requests.post(url, files=files, data=data)
+        response = self.session.post(url, data=_ConcatBody(mapping_section, compressed), headers=headers, timeout=self.timeout)
         return response.json(), response.status_code
     
+    def submit_many(self, submissions: list, max_workers: int = 8) -> list:
+        """Submit several challenge packages concurrently over the pooled session.
+        
+        Args:
+            submissions: Keyword-argument dicts for submit_challenge_data, one per package
+            max_workers: Maximum number of uploads in flight at once
+            
+        Returns:
+            List of (response_json, status_code) tuples in the order of submissions
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda kwargs: self.submit_challenge_data(**kwargs), submissions))
+    
+    def _compress_package(self, challenge_package: dict) -> bytes:
+        """Stream the package's JSON encoding through the compressor.
+        
+        Only small JSON pieces and the compressed output are held in memory, never
+        the full serialized document.
+        """
+        buf = io.BytesIO()
+        if self.compression == "zstd":
+            with _zstd_compressor().stream_writer(buf, closefd=False) as writer:
+                for chunk in _iter_json_chunks(challenge_package):
+                    writer.write(chunk)
+        else:
+            compressor = bz2.BZ2Compressor()
+            for chunk in _iter_json_chunks(challenge_package):
+                buf.write(compressor.compress(chunk))
+            buf.write(compressor.flush())
+        return buf.getvalue()
+    
     def get_authentication_challenge(self, user_id: str, key_name: str, timeout_minutes: int = 30):
         """Get an authentication challenge from the server for a specific user and key."""
         url = f"{self.server_url}/get_authentication_challenge"
@@ -64,33 +214,36 @@ class InteractiveMysteryClient:
             'timeout_minutes': timeout_minutes
         }
         
-        response = requests.post(url, json=data)
+        response = self.session.post(url, json=data, timeout=self.timeout)
         return response.json(), response.status_code
     
     def verify_solution(self, session_token: str, target_sequence: list, verifier_private_key: bytes):
         """Verify a solution against the server."""
         url = f"{self.server_url}/verify_solution"
+        # Send the key as a raw binary part rather than base64 inside JSON
+        files = {
+            'verifier_private_key': ('key.bin', verifier_private_key, 'application/octet-stream')
+        }
         data = {
             'session_token': session_token,
-            'target_sequence': target_sequence,
-            'verifier_private_key': base64.b64encode(verifier_private_key).decode('utf-8')
+            'target_sequence': _json_dumps(target_sequence).decode('utf-8')
         }
         
-        response = requests.post(url, json=data)
+        response = self.session.post(url, files=files, data=data, timeout=self.timeout)
         return response.json(), response.status_code
     
     def get_session_status(self, session_token: str):
         """Get the status of an authentication session."""
         url = f"{self.server_url}/session_status/{session_token}"
         
-        response = requests.get(url)
+        response = self.session.get(url, timeout=self.timeout)
         return response.json(), response.status_code
     
     def get_stats(self):
         """Get server statistics."""
         url = f"{self.server_url}/stats"
         
-        response = requests.get(url)
+        response = self.session.get(url, timeout=self.timeout)
         return response.json(), response.status_code
     
     def interactive_verification_sequence_entry(self, mapping_data_sets: list):
@@ -101,8 +254,7 @@ class InteractiveMysteryClient:
         self.console.print()
         
         # Use random permutation indices for security
-        display_permutation_index = secrets.randbelow(24) + 1
-        mapping_permutation_index = secrets.randbelow(24) + 1
+        display_permutation_index, mapping_permutation_index = _random_permutation_indices()
         
         # Create display instance
         display = MysteryGridDisplay(self.console, display_permutation_index, mapping_permutation_index)
@@ -131,7 +283,7 @@ def demo_interactive_authentication():
     
     # Step 1: Generate protocol data
     console.print("\n[bold yellow]1. Generating protocol data...[/bold yellow]")
-    protocol = MysteryProtocol()
+    protocol = client.protocol
     secret_string = "ABCD"
     segments = 4
     
@@ -211,12 +363,10 @@ def demo_interactive_authentication():
     console.print()
     
     # Convert mapping data to the format expected by MysteryGridDisplay
-    mapping_data_sets = []
-    for position_mapping in mapping_data:
-        position_data = []
-        for char, segment in position_mapping.items():
-            position_data.append({'character': char, 'segment': segment})
-        mapping_data_sets.append(position_data)
+    mapping_data_sets = [
+        [{'character': char, 'segment': segment} for char, segment in position_mapping.items()]
+        for position_mapping in mapping_data
+    ]
     
     # Show what the correct sequence should be for reference
     # Use only the actual secret string length from the stored extended mapping
@@ -301,8 +451,7 @@ def demo_practice_mode():
     practice_mappings = generate_random_mapping(num_positions, seed=None)
     
     # Use random permutation indices
-    display_permutation_index = secrets.randbelow(24) + 1
-    mapping_permutation_index = secrets.randbelow(24) + 1
+    display_permutation_index, mapping_permutation_index = _random_permutation_indices()
     
     # Create display instance
     display = MysteryGridDisplay(console, display_permutation_index, mapping_permutation_index)
@@ -334,6 +483,8 @@ if __name__ == "__main__":
         demo_practice_mode()
     else:
         # Full interactive demo with server
+        import requests
+        
         try:
             demo_interactive_authentication()
         except requests.exceptions.ConnectionError:
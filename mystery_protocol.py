@@ -1,14 +1,160 @@
+import sys
 import math
+import functools
 import json
-import random
 import string
 import base64
+import struct
 import hashlib
 import logging
-import tenseal as ts
-from reedsolo import RSCodec
+import secrets
+import threading
+import importlib.util
+import numpy as np
+from collections import OrderedDict
 from typing import List, Dict, Any, Tuple
 
+# msgpack is only needed for the binary package files (serialize_to_msgpack/load_from_msgpack)
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Reed-Solomon: prefer the compiled creedsolo backend, fall back to pure-Python reedsolo
+try:
+    from creedsolo import RSCodec
+except ImportError:
+    from reedsolo import RSCodec
+
+def _lazy_import(name: str):
+    """Return a module whose real import is deferred until an attribute is first used."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named '{name}'")
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+# TenSEAL loads the SEAL bindings, which callers that only need mappings never use
+ts = _lazy_import("tenseal")
+
+# Deserialized TenSEAL contexts keyed by a digest of their serialized bytes. A protocol run
+# touches four contexts (owner/verifier, private/public); each is large once loaded, so only
+# those are kept
+_CONTEXT_CACHE_SIZE = 4
+_context_cache: "OrderedDict[bytes, Any]" = OrderedDict()
+_context_cache_lock = threading.Lock()
+
+def _context_digest(serialized: bytes) -> bytes:
+    return hashlib.blake2b(serialized, digest_size=16).digest()
+
+def _remember_context(digest: bytes, context) -> None:
+    with _context_cache_lock:
+        _context_cache[digest] = context
+        _context_cache.move_to_end(digest)
+        while len(_context_cache) > _CONTEXT_CACHE_SIZE:
+            _context_cache.popitem(last=False)
+
+def _context_from(serialized: bytes):
+    """Return the TenSEAL context for serialized bytes, parsing them only on a cache miss."""
+    digest = _context_digest(serialized)
+    with _context_cache_lock:
+        context = _context_cache.get(digest)
+        if context is not None:
+            _context_cache.move_to_end(digest)
+            return context
+    context = ts.context_from(serialized)
+    _remember_context(digest, context)
+    return context
+
+# Independent blinded sums checked per sequence verification. A wrong sequence passes one
+# round with probability at most 1/(plain_modulus - 1), so about 2^-32 over two rounds at
+# the default plain_modulus of 65537
+_SEQUENCE_CHECK_ROUNDS = 2
+
+# Printable ASCII alphabet shared by the mapping generator and the protocol
+_ALPHABET: Tuple[str, ...] = tuple(string.ascii_letters + string.digits + string.punctuation + " ")
+_ALPHABET_LEN = len(_ALPHABET)
+
+@functools.lru_cache(maxsize=32)
+def _partition_of_slot(alphabet_size: int, num_segments: int) -> np.ndarray:
+    """Map each shuffled alphabet slot to its partition index.
+
+    The shuffled alphabet is cut into partitions of ceil(alphabet_size / num_segments),
+    so slot j belongs to partition j // partition_size. The result depends only on the
+    two sizes and is shared (read-only) across calls and MappingGenerator instances.
+    """
+    partition_size = math.ceil(alphabet_size / num_segments)
+    partition_of_slot = np.arange(alphabet_size) // partition_size
+    partition_of_slot.setflags(write=False)
+    return partition_of_slot
+
+def _sha256_of(*parts: str):
+    """SHA-256 of the concatenated text parts, fed to the hasher one part at a time.
+    
+    Digests are identical to hashing the joined string, so existing commitments and
+    password-protected packages remain valid.
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode('utf-8'))
+    return h
+
+# Schema tag for the binary mapping encoding; bump it if the layout below changes
+_MAPPINGS_DIGEST_TAG = b"mystery-mappings-v1"
+
+def _mappings_commitment(salt: str, mappings: List[Dict[str, int]]) -> str:
+    """Commitment hash over the salt and a canonical binary encoding of the mappings.
+    
+    Each position contributes its index and entry count, the lengths and UTF-8 text of
+    its sorted characters, and their segment values as big-endian int64, so the encoding
+    is injective without building a JSON string first.
+    
+    Args:
+        salt: Commitment salt (base64 text)
+        mappings: Per-position mapping dictionaries
+        
+    Returns:
+        Hex digest of the commitment
+    
+    Raises:
+        struct.error: If a segment value is not an integer that fits in 64 bits
+    """
+    h = hashlib.sha256(_MAPPINGS_DIGEST_TAG)
+    h.update(salt.encode('utf-8'))
+    for i, mapping in enumerate(mappings):
+        chars = sorted(mapping)
+        count = len(chars)
+        h.update(struct.pack(f'>II{count}I', i, count, *map(len, chars)))
+        h.update(''.join(chars).encode('utf-8'))
+        h.update(struct.pack(f'>{count}q', *[mapping[c] for c in chars]))
+    return h.hexdigest()
+
+@functools.lru_cache(maxsize=8)
+def _rs_codec(parity_bytes: int) -> RSCodec:
+    """Return the shared Reed-Solomon codec for the given number of parity bytes.
+    
+    Building an RSCodec regenerates its GF(256) tables and generator polynomials,
+    which costs far more than encoding or decoding a 48-byte prize codeword.
+    """
+    return RSCodec(parity_bytes)
+
+def _ciphertext_bytes(data) -> bytes:
+    """Return serialized ciphertext bytes, decoding the base64 text of JSON-loaded packages."""
+    if isinstance(data, str):
+        return base64.b64decode(data)
+    return bytes(data)
+
+def _xor_with_hash(chunks: List[int], hash_bytes: bytes) -> List[int]:
+    """XOR each chunk with the hash bytes, cycling through the hash as needed."""
+    mask = np.resize(np.frombuffer(hash_bytes, dtype=np.uint8), len(chunks))
+    return np.bitwise_xor(np.asarray(chunks, dtype=np.int64), mask).tolist()
+
 # =============================================================================
 # Core Logic Classes
 # =============================================================================
@@ -17,35 +163,50 @@ class MappingGenerator:
     """Generates the secret character-to-number mappings."""
     
     def __init__(self):
-        self.alphabet = list(string.ascii_letters + string.digits + string.punctuation + " ")
+        self.alphabet = _ALPHABET
         logging.debug(f"Initialized MappingGenerator with alphabet size: {len(self.alphabet)}")
     
+    @staticmethod
+    def _permutation_rows(rows: int, size: int) -> np.ndarray:
+        """Draw `rows` independent permutations of range(size) from the OS CSPRNG.
+
+        Each row is the argsort of `size` random 64-bit keys, so the mappings are as
+        unpredictable as the `secrets` values used elsewhere in the protocol.
+        """
+        keys = np.frombuffer(secrets.token_bytes(rows * size * 8), dtype=np.uint64).reshape(rows, size)
+        return np.argsort(keys, axis=1)
+    
+    def segment_matrix(self, length: int, num_segments: int) -> np.ndarray:
+        """Draw segment assignments for every position at once.
+
+        Args:
+            length: Number of positions.
+            num_segments: Number of segments each alphabet is split into.
+
+        Returns:
+            An int16 array of shape (length, alphabet_size) where entry [i, c]
+            is the segment number (1-based) of alphabet character c at position i.
+        """
+        alphabet_size = _ALPHABET_LEN
+        partition_of_slot = _partition_of_slot(alphabet_size, num_segments)
+        
+        # One independent permutation per row, for characters and for segment numbers
+        char_perms = self._permutation_rows(length, alphabet_size)
+        segment_perms = (self._permutation_rows(length, num_segments) + 1).astype(np.int16)
+        
+        matrix = np.empty((length, alphabet_size), dtype=np.int16)
+        np.put_along_axis(matrix, char_perms, segment_perms[:, partition_of_slot], axis=1)
+        return matrix
+    
     def generate(self, length: int, num_segments: int) -> List[Dict[str, int]]:
         """Generate secret mappings for character-to-number transformation."""
         logging.debug(f"Generating mappings with length={length}, num_segments={num_segments}")
         
         secret_mappings = []
-        for i in range(length):
-            alphabet_shuffled = self.alphabet[:]
-            random.shuffle(alphabet_shuffled)
-            
-            segment_numbers = list(range(1, num_segments + 1))
-            random.shuffle(segment_numbers)
-            
-            partition_size = math.ceil(len(alphabet_shuffled) / num_segments)
-            char_partitions = [alphabet_shuffled[j:j+partition_size] 
-                             for j in range(0, len(alphabet_shuffled), partition_size)]
-            
-            index_mapping_dict = {
-                char: seg_num 
-                for seg_num, char_group in zip(segment_numbers, char_partitions) 
-                for char in char_group
-            }
-            
-            secret_mappings.append(index_mapping_dict)
+        for i, row in enumerate(self.segment_matrix(length, num_segments).tolist()):
+            secret_mappings.append(dict(zip(self.alphabet, row)))
             logging.debug(f"Generated mapping {i+1}/{length}")
         
-        logging.debug(f"Completed generating {len(secret_mappings)} mappings")
         return secret_mappings
 
 # =============================================================================
@@ -55,15 +216,42 @@ class MappingGenerator:
 class MysteryProtocol:
     """Main protocol class that handles all cryptographic operations."""
     
-    def __init__(self, poly_mod_degree: int = 8192, plain_modulus: int = 65537):
+    def __init__(self, poly_mod_degree: int = 8192, plain_modulus: int = 65537, cache_contexts: bool = True):
+        """
+        Args:
+            poly_mod_degree: BFV polynomial modulus degree
+            plain_modulus: BFV plaintext modulus
+            cache_contexts: Keep deserialized contexts in the module-level cache and share
+                them between calls. Pass False when handling keys from untrusted callers
+                (e.g. a server verifying uploaded private keys) so secret-key contexts are not
+                retained after the call and no context object is shared between threads.
+        """
         self.poly_mod_degree = poly_mod_degree
         self.plain_modulus = plain_modulus
-        self.alphabet = list(string.ascii_letters + string.digits + string.punctuation + " ")
+        self.cache_contexts = cache_contexts
+        self.alphabet = _ALPHABET
         self.char_to_idx = {c: i for i, c in enumerate(self.alphabet)}
+        # One-hot rows of this many consecutive positions are packed into each BFV vector
+        self.positions_per_vector = poly_mod_degree // len(self.alphabet)
+        # Row i is the one-hot encoding of alphabet[i]; the extra last row is all zeros
+        # and stands in for characters outside the alphabet
+        self._one_hot_rows = np.eye(len(self.alphabet) + 1, len(self.alphabet), dtype=np.int64)
+        self._one_hot_rows.setflags(write=False)
         
         logging.debug(f"Initialized SecureProtocol with poly_mod_degree={poly_mod_degree}, plain_modulus={plain_modulus}")
         logging.debug(f"Alphabet size: {len(self.alphabet)}")
     
+    def _context(self, serialized: bytes):
+        """Deserialize a TenSEAL context, through the shared cache unless caching is disabled."""
+        if self.cache_contexts:
+            return _context_from(serialized)
+        return ts.context_from(serialized)
+    
+    def _remember(self, serialized: bytes, context) -> None:
+        """Seed the shared cache with a freshly generated context, if caching is enabled."""
+        if self.cache_contexts:
+            _remember_context(_context_digest(serialized), context)
+    
     def provision_keys(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
         """
         S1: Creates key pairs for all parties AND the secret prize.
@@ -84,6 +272,8 @@ class MysteryProtocol:
             'private_key': v_priv_ctx.serialize(save_secret_key=True),
             'public_context': v_pub_ctx.serialize()
         }
+        self._remember(verifier_keys['private_key'], v_priv_ctx)
+        self._remember(verifier_keys['public_context'], v_pub_ctx)
         
         logging.debug("Verifier keys generated")
         
@@ -98,6 +288,8 @@ class MysteryProtocol:
             'private_key': o_priv_ctx.serialize(save_secret_key=True),
             'public_context': o_pub_ctx.serialize()
         }
+        self._remember(owner_keys['private_key'], o_priv_ctx)
+        self._remember(owner_keys['public_context'], o_pub_ctx)
         
         logging.debug("Owner keys generated")
         
@@ -116,24 +308,21 @@ class MysteryProtocol:
         logging.debug("Starting prize generation")
         
         # Generate 256-bit secret prize
-        secret_prize = random.getrandbits(256)
+        secret_prize = secrets.randbits(256)
         logging.debug(f"Generated 256-bit prize: 0x{secret_prize:064x}")
         
         # Convert to bytes and apply Reed-Solomon encoding
         prize_bytes = secret_prize.to_bytes(32, 'big')
-        rs_codec = RSCodec(16)  # 16 parity bytes
-        encoded_prize_bytes = rs_codec.encode(prize_bytes)
+        encoded_prize_bytes = _rs_codec(16).encode(bytearray(prize_bytes))  # 16 parity bytes
         
         logging.debug(f"Reed-Solomon encoded: {len(prize_bytes)} data bytes + 16 parity bytes = {len(encoded_prize_bytes)} total bytes")
         
         # Load owner's public context
-        o_pub_ctx = ts.context_from(owner_public_context)
+        o_pub_ctx = self._context(owner_public_context)
         
-        # Encrypt each byte with owner's public key
-        encrypted_prize_chunks = []
-        for chunk in encoded_prize_bytes:
-            encrypted_chunk = ts.bfv_vector(o_pub_ctx, [chunk])
-            encrypted_prize_chunks.append(base64.b64encode(encrypted_chunk.serialize()).decode('utf-8'))
+        # Encrypt all codeword bytes with owner's public key as one batched vector (a byte per slot)
+        encrypted_chunk = ts.bfv_vector(o_pub_ctx, list(encoded_prize_bytes))
+        encrypted_prize_chunks = [encrypted_chunk.serialize()]
         
         prize_data = {
             "encrypted_prize_chunks_for_owner": encrypted_prize_chunks,
@@ -144,7 +333,7 @@ class MysteryProtocol:
             "original_prize_for_reference": secret_prize
         }
         
-        logging.debug(f"Prize encrypted in {len(encrypted_prize_chunks)} chunks")
+        logging.debug(f"Prize encrypted as {len(encoded_prize_bytes)} chunks in one batched vector")
         return prize_data
     
     def generate_mappings(self, length: int, segments: int = 10) -> Dict[str, Any]:
@@ -200,11 +389,10 @@ class MysteryProtocol:
         """
         logging.debug("Creating verifier commitment")
         
-        salt = base64.b64encode(random.getrandbits(256).to_bytes(32, 'big')).decode('utf-8')
-        mappings_str = json.dumps(secret_mappings, sort_keys=True)
-        commitment = hashlib.sha256((salt + mappings_str).encode()).hexdigest()
+        salt = base64.b64encode(secrets.token_bytes(32)).decode('utf-8')
+        commitment = _mappings_commitment(salt, secret_mappings)
         
-        password_hash_salt = base64.b64encode(random.getrandbits(256).to_bytes(32, 'big')).decode('utf-8')
+        password_hash_salt = base64.b64encode(secrets.token_bytes(32)).decode('utf-8')
         
         commitment_package = {
             "commitment": commitment,
@@ -216,7 +404,7 @@ class MysteryProtocol:
         logging.debug(f"Created commitment: {commitment[:16]}...")
         return commitment_package
     
-    def owner_register_data(self, owner_private_key: bytes, input_string: str) -> List[str]:
+    def owner_register_data(self, owner_private_key: bytes, input_string: str) -> List[bytes]:
         """
         Owner's Setup Step: Encrypt the secret string for reuse.
         
@@ -225,23 +413,26 @@ class MysteryProtocol:
             input_string: String to encrypt
             
         Returns:
-            List of base64-encoded encrypted vectors
+            List of serialized encrypted vectors, each packing the one-hot rows of
+            up to positions_per_vector consecutive characters
         """
         logging.debug(f"Registering data for input string of length {len(input_string)}")
         
-        o_ctx = ts.context_from(owner_private_key)
+        o_ctx = self._context(owner_private_key)
+        unknown_idx = len(self.alphabet)
+        row_indices = [self.char_to_idx.get(c, unknown_idx) for c in input_string]
         
         encrypted_vectors = []
-        for c in input_string:
-            # Create one-hot encoding for character
-            one_hot = [1 if i == self.char_to_idx.get(c, -1) else 0 for i in range(len(self.alphabet))]
-            encrypted_vector = ts.bfv_vector(o_ctx, one_hot)
-            encrypted_vectors.append(base64.b64encode(encrypted_vector.serialize()).decode('utf-8'))
+        for start in range(0, len(input_string), self.positions_per_vector):
+            # Lay the one-hot encodings of the characters out row by row in one vector
+            rows = self._one_hot_rows[row_indices[start:start + self.positions_per_vector]]
+            encrypted_vector = ts.bfv_vector(o_ctx, rows.ravel().tolist())
+            encrypted_vectors.append(encrypted_vector.serialize())
         
-        logging.debug(f"Encrypted {len(encrypted_vectors)} character vectors")
+        logging.debug(f"Encrypted {len(input_string)} characters in {len(encrypted_vectors)} packed vectors")
         return encrypted_vectors
     
-    def verifier_transform_data(self, owner_public_context: bytes, registered_data: List[str], 
+    def verifier_transform_data(self, owner_public_context: bytes, registered_data: List[bytes], 
                               commitment_package: Dict[str, Any]) -> Dict[str, Any]:
         """
         Verifier's Interactive Step: Apply mappings and reveal secrets.
@@ -256,18 +447,25 @@ class MysteryProtocol:
         """
         logging.debug("Applying mappings to registered data")
         
-        o_pub_ctx = ts.context_from(owner_public_context)
+        o_pub_ctx = self._context(owner_public_context)
         secret_mappings = commitment_package["secret_mappings"]
         
-        if len(registered_data) != len(secret_mappings):
-            raise ValueError(f"Data length mismatch: {len(registered_data)} vs {len(secret_mappings)}")
+        expected_vectors = math.ceil(len(secret_mappings) / self.positions_per_vector)
+        if len(registered_data) != expected_vectors:
+            raise ValueError(f"Data length mismatch: {len(registered_data)} packed vectors for {len(secret_mappings)} positions")
         
         transformed_vectors = []
-        for i, b64_enc_s in enumerate(registered_data):
-            enc_s = ts.bfv_vector_from(o_pub_ctx, base64.b64decode(b64_enc_s))
-            mapping_vec = [secret_mappings[i].get(c, 0) for c in self.alphabet]
-            enc_sm = enc_s.dot(mapping_vec)
-            transformed_vectors.append(base64.b64encode(enc_sm.serialize()).decode('utf-8'))
+        for i, enc_s_bytes in enumerate(registered_data):
+            enc_s = ts.bfv_vector_from(o_pub_ctx, _ciphertext_bytes(enc_s_bytes))
+            start = i * self.positions_per_vector
+            mapping_vec = [mapping.get(c, 0) for mapping in secret_mappings[start:start + self.positions_per_vector]
+                           for c in self.alphabet]
+            if enc_s.size() != len(mapping_vec):
+                raise ValueError(f"Data length mismatch: {enc_s.size()} vs {len(mapping_vec)} slots in packed vector {i}")
+            # One in-place slot-wise plaintext multiply per packed vector: each position's
+            # row keeps only its character's slot, now holding the mapped segment number
+            enc_s.mul_(mapping_vec)
+            transformed_vectors.append(enc_s.serialize())
         
         reveal_package = {
             "transformed_vectors": transformed_vectors,
@@ -285,6 +483,9 @@ class MysteryProtocol:
         """
         Owner's Interactive Step: Verify commitment, decrypt/re-encrypt prize, and finalize data.
         
+        Equivalent to owner_finalize_sequence followed by owner_finalize_prize, but the
+        commitment is checked and the transformed vectors are decrypted only once.
+        
         Args:
             owner_private_key: Owner's private key bytes
             verifier_public_context: Verifier's public context bytes
@@ -298,72 +499,148 @@ class MysteryProtocol:
         """
         logging.debug("Finalizing data and verifying commitment")
         
-        # Verify commitment
+        o_priv_ctx = self._context(owner_private_key)
+        v_pub_ctx = self._context(verifier_public_context)
+        password_sequence = self._verified_password_sequence(o_priv_ctx, reveal_package, commitment)
+        
+        final_package = {
+            "prize_data": self._protect_prize(o_priv_ctx, v_pub_ctx, password_sequence, reveal_package,
+                                              prize_data, include_debug_info),
+            "sequence_data": self._encrypt_sequence(v_pub_ctx, password_sequence)
+        }
+        
+        logging.debug("Final package created successfully")
+        return final_package
+    
+    def owner_finalize_sequence(self, owner_private_key: bytes, verifier_public_context: bytes,
+                                reveal_package: Dict[str, Any], commitment: str) -> Dict[str, Any]:
+        """
+        Owner's Interactive Step (sequence only): Verify commitment and re-encrypt the sequence.
+        
+        Lets the verifier run verifier_verify_sequence before the owner spends any work on
+        the prize; call owner_finalize_prize only once the sequence has matched.
+        
+        Args:
+            owner_private_key: Owner's private key bytes
+            verifier_public_context: Verifier's public context bytes
+            reveal_package: Package from verifier_transform_data
+            commitment: Expected commitment hash
+            
+        Returns:
+            Dictionary containing sequence_data
+        """
+        logging.debug("Finalizing sequence data and verifying commitment")
+        
+        o_priv_ctx = self._context(owner_private_key)
+        v_pub_ctx = self._context(verifier_public_context)
+        password_sequence = self._verified_password_sequence(o_priv_ctx, reveal_package, commitment)
+        
+        return {"sequence_data": self._encrypt_sequence(v_pub_ctx, password_sequence)}
+    
+    def owner_finalize_prize(self, owner_private_key: bytes, verifier_public_context: bytes,
+                             reveal_package: Dict[str, Any], commitment: str,
+                             prize_data: Dict[str, Any], include_debug_info: bool = False) -> Dict[str, Any]:
+        """
+        Owner's Interactive Step (prize only): Password-protect and re-encrypt the prize.
+        
+        Args:
+            owner_private_key: Owner's private key bytes
+            verifier_public_context: Verifier's public context bytes
+            reveal_package: Package from verifier_transform_data
+            commitment: Expected commitment hash
+            prize_data: Prize data from generate_prize
+            include_debug_info: Whether to include original_data_bytes and original_prize_for_reference
+            
+        Returns:
+            Prize data dictionary, as stored under "prize_data" in the final package
+        """
+        logging.debug("Finalizing prize data and verifying commitment")
+        
+        o_priv_ctx = self._context(owner_private_key)
+        v_pub_ctx = self._context(verifier_public_context)
+        password_sequence = self._verified_password_sequence(o_priv_ctx, reveal_package, commitment)
+        
+        return self._protect_prize(o_priv_ctx, v_pub_ctx, password_sequence, reveal_package,
+                                   prize_data, include_debug_info)
+    
+    def _verified_password_sequence(self, o_priv_ctx, reveal_package: Dict[str, Any], commitment: str) -> List[int]:
+        """
+        Check the verifier's commitment, then decrypt the transformed vectors.
+        
+        Args:
+            o_priv_ctx: Owner's private TenSEAL context
+            reveal_package: Package from verifier_transform_data
+            commitment: Expected commitment hash
+            
+        Returns:
+            Password sequence, one mapped value per character position
+        """
         salt = reveal_package["salt"]
         received_mappings = reveal_package["secret_mappings"]
-        mappings_str = json.dumps(received_mappings, sort_keys=True)
-        recomputed_commitment = hashlib.sha256((salt + mappings_str).encode()).hexdigest()
+        try:
+            recomputed_commitment = _mappings_commitment(salt, received_mappings)
+        except (struct.error, TypeError, AttributeError):
+            raise ValueError("Commitment verification failed - malformed secret mappings!")
         
         if recomputed_commitment != commitment:
             raise ValueError("Commitment verification failed - verifier is cheating!")
         
         logging.debug("Commitment verified successfully")
         
-        # Load contexts
-        o_priv_ctx = ts.context_from(owner_private_key)
-        v_pub_ctx = ts.context_from(verifier_public_context)
-        
-        # Generate password sequence
-        password_sequence = []
-        for b64_enc_sm in reveal_package["transformed_vectors"]:
-            enc_sm = ts.bfv_vector_from(o_priv_ctx, base64.b64decode(b64_enc_sm))
-            decrypted_value = enc_sm.decrypt()[0]
-            password_sequence.append(decrypted_value)
+        return self._decrypt_transformed(o_priv_ctx, reveal_package["transformed_vectors"])
+    
+    def _encrypt_sequence(self, v_pub_ctx, password_sequence: List[int]) -> List[bytes]:
+        """Re-encrypt the password sequence for the verifier, one slot per position."""
+        final_sequence_data = []
+        for start in range(0, len(password_sequence), self.poly_mod_degree):
+            final_ciphertext = ts.bfv_vector(v_pub_ctx, password_sequence[start:start + self.poly_mod_degree])
+            final_sequence_data.append(final_ciphertext.serialize())
+        return final_sequence_data
+    
+    def _protect_prize(self, o_priv_ctx, v_pub_ctx, password_sequence: List[int], reveal_package: Dict[str, Any],
+                       prize_data: Dict[str, Any], include_debug_info: bool) -> Dict[str, Any]:
+        """
+        Decrypt the prize, XOR it with the password-dependent hash and re-encrypt it for the verifier.
         
+        Args:
+            o_priv_ctx: Owner's private TenSEAL context
+            v_pub_ctx: Verifier's public TenSEAL context
+            password_sequence: Decrypted password sequence
+            reveal_package: Package from verifier_transform_data
+            prize_data: Prize data from generate_prize
+            include_debug_info: Whether to include original_data_bytes and original_prize_for_reference
+            
+        Returns:
+            Prize data dictionary for the final package
+        """
         # Generate password-dependent hash
         password_hash_salt = reveal_package.get("password_hash_salt", "")
         password_sequence_str = ",".join(map(str, password_sequence))
-        password_dependent_hash = hashlib.sha256((password_hash_salt + password_sequence_str).encode()).hexdigest()
+        password_dependent_hash = _sha256_of(password_hash_salt, password_sequence_str)
         
-        logging.debug(f"Generated password hash: {password_dependent_hash[:16]}...")
+        logging.debug(f"Generated password hash: {password_dependent_hash.hexdigest()[:16]}...")
         
         # Re-encrypt prize for verifier with password protection
         decrypted_prize_chunks = []
-        for chunk_b64 in prize_data["encrypted_prize_chunks_for_owner"]:
-            encrypted_chunk = ts.bfv_vector_from(o_priv_ctx, base64.b64decode(chunk_b64))
-            decrypted_chunk = encrypted_chunk.decrypt()[0]
-            decrypted_prize_chunks.append(decrypted_chunk)
+        for chunk_bytes in prize_data["encrypted_prize_chunks_for_owner"]:
+            encrypted_chunk = ts.bfv_vector_from(o_priv_ctx, _ciphertext_bytes(chunk_bytes))
+            decrypted_prize_chunks.extend(encrypted_chunk.decrypt())
         
         # Apply password protection
-        hash_bytes = bytes.fromhex(password_dependent_hash)
-        protected_chunks = []
-        for i, chunk in enumerate(decrypted_prize_chunks):
-            protection_byte = hash_bytes[i % len(hash_bytes)]
-            protected_chunk = chunk ^ protection_byte
-            protected_chunks.append(protected_chunk)
-        
-        # Re-encrypt for verifier
-        encrypted_prize_chunks_for_verifier = []
-        for protected_chunk in protected_chunks:
-            encrypted_chunk = ts.bfv_vector(v_pub_ctx, [protected_chunk])
-            encrypted_prize_chunks_for_verifier.append(base64.b64encode(encrypted_chunk.serialize()).decode('utf-8'))
+        hash_bytes = password_dependent_hash.digest()
+        protected_chunks = _xor_with_hash(decrypted_prize_chunks, hash_bytes)
         
-        logging.debug("Prize re-encrypted for verifier with password protection")
+        # Re-encrypt for verifier as one batched vector
+        encrypted_chunk = ts.bfv_vector(v_pub_ctx, protected_chunks)
+        encrypted_prize_chunks_for_verifier = [encrypted_chunk.serialize()]
         
-        # Finalize sequence data
-        final_sequence_data = []
-        for b64_enc_sm in reveal_package["transformed_vectors"]:
-            enc_sm = ts.bfv_vector_from(o_priv_ctx, base64.b64decode(b64_enc_sm))
-            final_ciphertext = ts.bfv_vector(v_pub_ctx, [enc_sm.decrypt()[0]])
-            final_sequence_data.append(base64.b64encode(final_ciphertext.serialize()).decode('utf-8'))
+        logging.debug("Prize re-encrypted for verifier with password protection")
         
-        # Build prize data dictionary with conditional debug info
+        # Build prize data dictionary with conditional debug info; keys are inserted
+        # in sorted order so the package serializes canonically without key sorting
         prize_data_dict = {
-            "prize_chunks": encrypted_prize_chunks_for_verifier,
-            "password_hash_salt": password_hash_salt,
             "chunk_bits": prize_data["chunk_bits"],
-            "num_chunks": prize_data["num_chunks"],
-            "rs_parity_bytes": prize_data["rs_parity_bytes"]
+            "num_chunks": prize_data["num_chunks"]
         }
         
         # Only include debug information if requested
@@ -371,13 +648,34 @@ class MysteryProtocol:
             prize_data_dict["original_data_bytes"] = prize_data["original_data_bytes"]
             prize_data_dict["original_prize_for_reference"] = prize_data.get("original_prize_for_reference", 0)
         
-        final_package = {
-            "sequence_data": final_sequence_data,
-            "prize_data": prize_data_dict
-        }
+        prize_data_dict["password_hash_salt"] = password_hash_salt
+        prize_data_dict["prize_chunks"] = encrypted_prize_chunks_for_verifier
+        prize_data_dict["rs_parity_bytes"] = prize_data["rs_parity_bytes"]
+        return prize_data_dict
+    
+    def _random_blinders(self, count: int) -> List[int]:
+        """Draw count independent uniform blinders in [1, plain_modulus) from the CSPRNG."""
+        words = np.frombuffer(secrets.token_bytes(8 * count), dtype=np.uint64)
+        return (words % np.uint64(self.plain_modulus - 1) + np.uint64(1)).tolist()
+    
+    def _decrypt_transformed(self, o_priv_ctx, transformed_vectors: List[bytes]) -> List[int]:
+        """
+        Decrypt packed transformed vectors into one mapped value per position.
         
-        logging.debug("Final package created successfully")
-        return final_package
+        Args:
+            o_priv_ctx: Owner's private TenSEAL context
+            transformed_vectors: Serialized vectors from verifier_transform_data
+            
+        Returns:
+            List of mapped values, one per character position
+        """
+        alphabet_size = len(self.alphabet)
+        values = []
+        for enc_sm_bytes in transformed_vectors:
+            slots = np.array(ts.bfv_vector_from(o_priv_ctx, _ciphertext_bytes(enc_sm_bytes)).decrypt(), dtype=np.int64)
+            # Each alphabet-sized row has a single non-zero slot; summing the row folds it to the value
+            values.extend(slots.reshape(-1, alphabet_size).sum(axis=1).tolist())
+        return values
     
     def verifier_verify(self, verifier_private_key: bytes, final_package: Dict[str, Any], 
                        target_sequence: List[int]) -> Tuple[bool, int]:
@@ -396,60 +694,34 @@ class MysteryProtocol:
         #logging.info(f"Target sequence: {target_sequence}")
         #logging.info(f"Sequence data: {len(final_package['sequence_data'])}")
         
-        v_priv_ctx = ts.context_from(verifier_private_key)
-        
-        sequence_data = final_package["sequence_data"]
-        prize_data = final_package["prize_data"]
-        
-        # Load encrypted prize chunks
-        encrypted_prize_chunks = []
-        for chunk_b64 in prize_data["prize_chunks"]:
-            encrypted_chunk = ts.bfv_vector_from(v_priv_ctx, base64.b64decode(chunk_b64))
-            encrypted_prize_chunks.append(encrypted_chunk)
-        
-        # Verify sequence using sum of squares
-        total_sum_of_squares = ts.bfv_vector(v_priv_ctx, [0])
-        for i, b64_enc_final in enumerate(sequence_data):
-            enc_final = ts.bfv_vector_from(v_priv_ctx, base64.b64decode(b64_enc_final))
-            diff = enc_final - [target_sequence[i] if i < len(target_sequence) else 0]
-            squared_diff = diff * diff
-            total_sum_of_squares += squared_diff
-
-        decrypted_locked_sum = total_sum_of_squares.decrypt()[0]
-        
-        is_match = (round(decrypted_locked_sum) == 0)
-        
-        logging.debug(f"Sequence verification result: {is_match}")
-        
-        if not is_match:
+        v_priv_ctx = self._context(verifier_private_key)
+        if not self._sequence_matches(v_priv_ctx, final_package["sequence_data"], target_sequence):
             logging.debug("Sequence doesn't match - prize remains locked")
             return False, 0
         
+        prize_data = final_package["prize_data"]
+        
         # Compute password hash for prize decryption
         password_hash_salt = prize_data.get("password_hash_salt", "")
         password_sequence_str = ",".join(map(str, target_sequence))
-        computed_password_hash = hashlib.sha256((password_hash_salt + password_sequence_str).encode()).hexdigest()
+        computed_password_hash = _sha256_of(password_hash_salt, password_sequence_str)
         
         logging.debug("Password hash computed - proceeding with prize decryption")
         
-        # Decrypt password-protected chunks
+        # Decrypt password-protected chunks (one batched vector, or one vector per chunk in older packages)
         decrypted_protected_chunks = []
-        for encrypted_chunk in encrypted_prize_chunks:
-            chunk_value = encrypted_chunk.decrypt()[0]
-            decrypted_protected_chunks.append(chunk_value)
+        for chunk_bytes in prize_data["prize_chunks"]:
+            encrypted_chunk = ts.bfv_vector_from(v_priv_ctx, _ciphertext_bytes(chunk_bytes))
+            decrypted_protected_chunks.extend(encrypted_chunk.decrypt())
         
         # Remove password protection
-        hash_bytes = bytes.fromhex(computed_password_hash)
-        decrypted_chunks = []
-        for i, protected_chunk in enumerate(decrypted_protected_chunks):
-            protection_byte = hash_bytes[i % len(hash_bytes)]
-            original_chunk = protected_chunk ^ protection_byte
-            decrypted_chunks.append(original_chunk)
+        hash_bytes = computed_password_hash.digest()
+        decrypted_chunks = _xor_with_hash(decrypted_protected_chunks, hash_bytes)
         
         # Reconstruct prize using Reed-Solomon
         try:
-            rs_codec = RSCodec(prize_data.get("rs_parity_bytes", 16))
-            rs_encoded_bytes = bytes(decrypted_chunks)
+            rs_codec = _rs_codec(prize_data.get("rs_parity_bytes", 16))
+            rs_encoded_bytes = bytearray(decrypted_chunks)
             decoded_prize_bytes = rs_codec.decode(rs_encoded_bytes)[0]
             reconstructed_prize = int.from_bytes(decoded_prize_bytes, 'big')
             
@@ -460,15 +732,69 @@ class MysteryProtocol:
             logging.error(f"Reed-Solomon decoding failed: {e}")
             return False, 0
 
+    def verifier_verify_sequence(self, verifier_private_key: bytes, sequence_data: List[bytes],
+                                 target_sequence: List[int]) -> bool:
+        """
+        Verifier's Check: Compare the encrypted sequence with a target without touching the prize.
+        
+        Args:
+            verifier_private_key: Verifier's private key bytes
+            sequence_data: sequence_data from owner_finalize_data or owner_finalize_sequence
+            target_sequence: Target sequence to verify
+            
+        Returns:
+            True if the sequence matches the target
+            
+        A matching sequence always passes. A wrong one is accepted only if every one of
+        _SEQUENCE_CHECK_ROUNDS independently blinded sums is zero, which happens with
+        probability at most (1/(plain_modulus - 1))^_SEQUENCE_CHECK_ROUNDS (about 2^-32 by
+        default). Unlike verifier_verify, there is no Reed-Solomon decode behind this check.
+        """
+        return self._sequence_matches(self._context(verifier_private_key), sequence_data, target_sequence)
+    
+    def _sequence_matches(self, v_priv_ctx, sequence_data: List[bytes], target_sequence: List[int]) -> bool:
+        """Run the encrypted sequence comparison with an already deserialized verifier context."""
+        # Verify sequence using blinded sums of squares: one subtraction and one square per
+        # batched vector, then per round a multiply by fresh random nonzero blinders and one
+        # slot sum. The blinders hide how far each position (and the total) is from the target;
+        # a wrong sequence has to hit zero in every round to pass.
+        round_sums = [ts.bfv_vector(v_priv_ctx, [0]) for _ in range(_SEQUENCE_CHECK_ROUNDS)]
+        offset = 0
+        for enc_final_bytes in sequence_data:
+            enc_final = ts.bfv_vector_from(v_priv_ctx, _ciphertext_bytes(enc_final_bytes))
+            size = enc_final.size()
+            target_plain = [target_sequence[i] if i < len(target_sequence) else 0 for i in range(offset, offset + size)]
+            diff = enc_final - target_plain
+            diff.mul_(diff)
+            for round_sum in round_sums:
+                round_sum += (diff * self._random_blinders(size)).sum()
+            offset += size
+        
+        is_match = all(round(round_sum.decrypt()[0]) == 0 for round_sum in round_sums)
+        
+        logging.debug(f"Sequence verification result: {is_match}")
+        return is_match
+
 # =============================================================================
 # Utility Functions
 # =============================================================================
 
+def json_default(obj: Any) -> str:
+    """JSON encoder fallback that writes raw ciphertext bytes as base64 text.
+    
+    Protocol packages hold serialized ciphertexts as bytes; pass this as ``default``
+    to json.dump(s) or orjson.dumps when a package has to cross a JSON boundary.
+    The protocol methods accept either form on input.
+    """
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return base64.b64encode(obj).decode('ascii')
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
 def serialize_to_json(data: Any, filename: str) -> None:
-    """Serialize data to JSON file."""
+    """Serialize data to JSON file, storing ciphertext bytes as base64."""
     logging.debug(f"Serializing data to {filename}")
     with open(filename, 'w') as f:
-        json.dump(data, f, indent=4)
+        json.dump(data, f, indent=4, default=json_default)
 
 def load_from_json(filename: str) -> Any:
     """Load data from JSON file."""
@@ -476,6 +802,35 @@ def load_from_json(filename: str) -> Any:
     with open(filename, 'r') as f:
         return json.load(f)
 
+# msgpack extension type for integers wider than 64 bits (e.g. the 256-bit prize)
+_MSGPACK_BIGINT_EXT = 1
+
+def _msgpack_default(obj: Any) -> Any:
+    """msgpack fallback that stores integers wider than 64 bits as signed big-endian bytes."""
+    if isinstance(obj, int):
+        return msgpack.ExtType(_MSGPACK_BIGINT_EXT, obj.to_bytes(obj.bit_length() // 8 + 1, 'big', signed=True))
+    raise TypeError(f"Object of type {type(obj).__name__} is not msgpack serializable")
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    """Decode the extension types written by _msgpack_default."""
+    if code == _MSGPACK_BIGINT_EXT:
+        return int.from_bytes(data, 'big', signed=True)
+    return msgpack.ExtType(code, data)
+
+def serialize_to_msgpack(data: Any, filename: str) -> None:
+    """Serialize data to a msgpack file, storing ciphertext bytes as raw binary."""
+    if msgpack is None:
+        raise ImportError("serialize_to_msgpack requires msgpack (pip install msgpack)")
+    logging.debug(f"Serializing data to {filename}")
+    save_binary_data(msgpack.packb(data, use_bin_type=True, default=_msgpack_default), filename)
+
+def load_from_msgpack(filename: str) -> Any:
+    """Load data from a msgpack file written by serialize_to_msgpack."""
+    if msgpack is None:
+        raise ImportError("load_from_msgpack requires msgpack (pip install msgpack)")
+    logging.debug(f"Loading data from {filename}")
+    return msgpack.unpackb(load_binary_data(filename), raw=False, ext_hook=_msgpack_ext_hook)
+
 def save_binary_data(data: bytes, filename: str) -> None:
     """Save binary data to file."""
     logging.debug(f"Saving binary data to {filename}")
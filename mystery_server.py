@@ -1,20 +1,31 @@
 #!/usr/bin/env python3
 
 import traceback
+import functools
 import hashlib
 import base64
 import json
 import secrets
 import logging
 import uuid
+import urllib.parse
 import bz2
-from typing import Dict, List, Any, Tuple, Optional
-from flask import Flask, request, jsonify
+import sqlite3
+import gzip
+import threading
+import orjson
+import zstandard as zstd
+from collections import OrderedDict
+from typing import Dict, List, Any, Tuple, Optional, Union
+from flask import Flask, Response, request, jsonify
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, text
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.orm import joinedload
 from datetime import datetime, timedelta, UTC
 
 # Import the MysteryProtocol
-from mystery_protocol import MysteryProtocol
+from mystery_protocol import MysteryProtocol, MappingGenerator
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -23,17 +34,85 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///mystery_server.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Pooled connections shared across request threads; waits up to 30s on a locked database
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_size': 20,
+    'max_overflow': 5,
+    'connect_args': {'check_same_thread': False, 'timeout': 30}
+}
+# Path to a zstd dictionary shared with clients (see MysteryServerClient.train_dict); None disables it
+app.config['ZSTD_DICTIONARY_PATH'] = None
 db = SQLAlchemy(app)
 
 # Initialize the MysteryProtocol
-protocol = MysteryProtocol()
+# Verifier private keys are uploaded by users, so their contexts are never cached or shared
+protocol = MysteryProtocol(cache_contexts=False)
+mapping_generator = MappingGenerator()
+
+# Frame header written by zstd; anything else is treated as legacy bz2
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# Uploaded challenge packages are read in chunks of this size, and may decompress to at most
+# MAX_CHALLENGE_PACKAGE_SIZE bytes of JSON (guards against compression bombs)
+UPLOAD_CHUNK_SIZE = 64 * 1024
+MAX_CHALLENGE_PACKAGE_SIZE = 64 * 1024 * 1024
+
+# An uploaded mapping (the v2 body's leading section or the multipart part) may be at most this many
+# bytes as sent, and its JSON at most this many bytes after zstd decompression
+MAX_MAPPING_UPLOAD_SIZE = 1024 * 1024
+
+# JSON responses smaller than this are sent uncompressed
+RESPONSE_COMPRESSION_MIN_SIZE = 1024
+
+# Number of extended mappings (as JSON bytes) kept in memory, keyed by data file
+MAPPING_CACHE_SIZE = 1024
 
 # Rate limiting configuration
 VERIFICATION_ATTEMPTS_PER_HOUR_PER_CHALLENGE = 20  # Max failed attempts per user per hour
 
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    """Use WAL so readers are not blocked by the writer, and keep temp data and a 64 MB page cache in memory."""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+# Only this app's engine gets the pragmas, not every engine in the process
+with app.app_context():
+    event.listen(db.engine, "connect", configure_sqlite_connection)
+
+class UTCDateTime(TypeDecorator):
+    """
+    DateTime column that always hands back timezone-aware UTC values.
+    
+    SQLite has no timezone-aware timestamp type (DateTime(timezone=True) is stored naive
+    and read back naive), so values are converted to naive UTC on the way in, including
+    query parameters, and tagged as UTC on the way out. The stored format is unchanged.
+    """
+    impl = db.DateTime
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(UTC).replace(tzinfo=None)
+        return value
+    
+    def process_result_value(self, value, dialect):
+        if value is not None:
+            value = value.replace(tzinfo=UTC)
+        return value
+
 # Database Models
 class ChallengeDataFile(db.Model):
     __tablename__ = 'challenge_data_files'
+    # Partial index over the unused files only, for the next-file lookup in get_authentication_challenge
+    __table_args__ = (
+        db.Index('ix_cdf_unused_keyidx', 'user_id', 'key_name', 'key_index', sqlite_where=text('is_used = 0')),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), nullable=False)
@@ -41,41 +120,52 @@ class ChallengeDataFile(db.Model):
     key_index = db.Column(db.Integer, nullable=False)
     file_hash = db.Column(db.String(64), unique=True, nullable=False)
     challenge_package = db.Column(db.LargeBinary, nullable=False)  # Compressed raw bytes
-    unencrypted_mapping = db.Column(db.Text, nullable=False)  # JSON string (extended to 64 chars)
+    unencrypted_mapping = db.Column(db.LargeBinary, nullable=False)  # zstd-compressed JSON (extended to 64 chars); legacy rows hold JSON text
     mapping_sequence_hash = db.Column(db.String(64), nullable=False)
-    created_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC))
+    created_at = db.Column(UTCDateTime, default=lambda: datetime.now(UTC))
     is_used = db.Column(db.Boolean, default=False)
     
-    def to_dict(self):
-        return {
+    # Relationship
+    sessions = db.relationship('AuthenticationSession', back_populates='data_file')
+    
+    def to_dict(self, include_package: bool = False):
+        """Return the record as a dict; the multi-MB challenge package is only decompressed on request."""
+        data = {
             'id': self.id,
             'user_id': self.user_id,
             'key_name': self.key_name,
             'key_index': self.key_index,
             'file_hash': self.file_hash,
-            'challenge_package': decompress_challenge_package(bytes(self.challenge_package)),
-            'unencrypted_mapping': json.loads(self.unencrypted_mapping),
+            'unencrypted_mapping': orjson.loads(load_stored_mapping_json(self)),
             'mapping_sequence_hash': self.mapping_sequence_hash,
-            'created_at': ensure_timezone_aware(self.created_at).isoformat(),
+            'created_at': self.created_at.isoformat(),
             'is_used': self.is_used
         }
+        if include_package:
+            data['challenge_package'] = decompress_challenge_package(self.challenge_package)
+        return data
 
 class AuthenticationSession(db.Model):
     __tablename__ = 'authentication_sessions'
+    # Partial index over the unverified sessions only, for the active session count in get_stats
+    __table_args__ = (
+        db.Index('ix_as_active', 'expires_at', sqlite_where=text('is_verified = 0')),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     session_token = db.Column(db.String(64), unique=True, nullable=False)
     data_file_id = db.Column(db.String(36), db.ForeignKey('challenge_data_files.id'), nullable=False)
     user_id = db.Column(db.String(36), nullable=False)
     mapping_sequence_hash = db.Column(db.String(64), nullable=False)
-    created_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC))
-    expires_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(UTCDateTime, default=lambda: datetime.now(UTC))
+    expires_at = db.Column(UTCDateTime, nullable=False)
     is_verified = db.Column(db.Boolean, default=False)
     verification_attempts = db.Column(db.Integer, default=0)
     max_attempts = db.Column(db.Integer, default=3)
     
     # Relationship
-    data_file = db.relationship('ChallengeDataFile', backref='sessions')
+    data_file = db.relationship('ChallengeDataFile', back_populates='sessions')
+    attempts = db.relationship('VerificationAttempt', back_populates='session')
     
     def to_dict(self):
         return {
@@ -84,8 +174,8 @@ class AuthenticationSession(db.Model):
             'data_file_id': self.data_file_id,
             'user_id': self.user_id,
             'mapping_sequence_hash': self.mapping_sequence_hash,
-            'created_at': ensure_timezone_aware(self.created_at).isoformat(),
-            'expires_at': ensure_timezone_aware(self.expires_at).isoformat(),
+            'created_at': self.created_at.isoformat(),
+            'expires_at': self.expires_at.isoformat(),
             'is_verified': self.is_verified,
             'verification_attempts': self.verification_attempts,
             'max_attempts': self.max_attempts
@@ -93,15 +183,19 @@ class AuthenticationSession(db.Model):
 
 class VerificationAttempt(db.Model):
     __tablename__ = 'verification_attempts'
+    # Covers the rate-limit count: equality on user_id and was_successful, range on attempted_at
+    __table_args__ = (
+        db.Index('ix_va_user_success_time', 'user_id', 'was_successful', 'attempted_at'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     session_id = db.Column(db.String(36), db.ForeignKey('authentication_sessions.id'), nullable=False)
     user_id = db.Column(db.String(36), nullable=False)
     was_successful = db.Column(db.Boolean, nullable=False)
-    attempted_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC))
+    attempted_at = db.Column(UTCDateTime, default=lambda: datetime.now(UTC))
     
     # Relationship
-    session = db.relationship('AuthenticationSession', backref='attempts')
+    session = db.relationship('AuthenticationSession', back_populates='attempts')
     
     def to_dict(self):
         return {
@@ -109,39 +203,210 @@ class VerificationAttempt(db.Model):
             'session_id': self.session_id,
             'user_id': self.user_id,
             'was_successful': self.was_successful,
-            'attempted_at': ensure_timezone_aware(self.attempted_at).isoformat()
+            'attempted_at': self.attempted_at.isoformat()
         }
 
 # Utility Functions
-def decompress_challenge_package(compressed_bytes: bytes) -> Dict[str, Any]:
-    """Decompress bz2 compressed challenge package from raw bytes."""
-    decompressed = bz2.decompress(compressed_bytes)
-    return json.loads(decompressed.decode('utf-8'))
+@functools.lru_cache(maxsize=1)
+def load_zstd_dictionary() -> Optional[zstd.ZstdCompressionDict]:
+    """Load the configured zstd dictionary once, or return None if there is none."""
+    dict_path = app.config.get('ZSTD_DICTIONARY_PATH')
+    if not dict_path:
+        return None
+    with open(dict_path, 'rb') as f:
+        return zstd.ZstdCompressionDict(f.read())
 
-def create_mapping_sequence_hash(mapping: List[Dict[str, int]]) -> str:
-    """Create a hash of the mapping sequence for uniqueness checking."""
-    mapping_str = json.dumps(mapping, sort_keys=True)
-    return hashlib.sha256(mapping_str.encode()).hexdigest()
+# zstd (de)compressors must not be used from two threads at once, so each request thread keeps its own
+_zstd_local = threading.local()
+
+def get_zstd_decompressor() -> zstd.ZstdDecompressor:
+    """Return the calling thread's zstd decompressor, using the configured dictionary if there is one."""
+    dctx = getattr(_zstd_local, 'dctx', None)
+    if dctx is None:
+        dctx = _zstd_local.dctx = zstd.ZstdDecompressor(dict_data=load_zstd_dictionary())
+    return dctx
+
+def get_zstd_compressor() -> zstd.ZstdCompressor:
+    """Return the calling thread's level-3 zstd compressor (used for stored mappings and responses)."""
+    cctx = getattr(_zstd_local, 'cctx', None)
+    if cctx is None:
+        cctx = _zstd_local.cctx = zstd.ZstdCompressor(level=3)
+    return cctx
 
-def create_file_hash(compressed_challenge_package: bytes) -> str:
-    """Create a hash of the compressed challenge package for uniqueness checking."""
-    return hashlib.sha256(compressed_challenge_package).hexdigest()
+def decompress_challenge_package(compressed_bytes: Union[bytes, bytearray, memoryview]) -> Dict[str, Any]:
+    """Decompress zstd or bz2 compressed challenge package from any bytes-like buffer, without copying it."""
+    compressed_bytes = memoryview(compressed_bytes)
+    if compressed_bytes[:4] == ZSTD_MAGIC:
+        decompressed = get_zstd_decompressor().decompressobj().decompress(compressed_bytes)
+    else:
+        decompressed = bz2.decompress(compressed_bytes)
+    return orjson.loads(decompressed)
+
+def compress_mapping(mapping: List[Dict[str, int]]) -> bytes:
+    """Serialize an extended mapping to zstd-compressed JSON for the unencrypted_mapping column."""
+    return get_zstd_compressor().compress(orjson.dumps(mapping))
+
+def decode_stored_mapping(stored: Any) -> bytes:
+    """Return the JSON bytes of an unencrypted_mapping column value (zstd-compressed, or JSON text in legacy rows)."""
+    if isinstance(stored, str):
+        return stored.encode('utf-8')
+    dctx = getattr(_zstd_local, 'mapping_dctx', None)
+    if dctx is None:
+        dctx = _zstd_local.mapping_dctx = zstd.ZstdDecompressor()
+    return dctx.decompress(stored)
+
+_mapping_cache: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+_mapping_cache_lock = threading.Lock()
+
+def load_stored_mapping_json(data_file: ChallengeDataFile) -> bytes:
+    """
+    Return the extended mapping of a data file as JSON bytes, from a small LRU cache when possible.
+    
+    Entries are keyed by file id and mapping_sequence_hash. The bytes can be spliced into
+    a response body as they are, so serving a challenge needs no decode/re-encode.
+    """
+    key = (data_file.id, data_file.mapping_sequence_hash)
+    with _mapping_cache_lock:
+        mapping_json = _mapping_cache.get(key)
+        if mapping_json is not None:
+            _mapping_cache.move_to_end(key)
+            return mapping_json
+    
+    mapping_json = decode_stored_mapping(data_file.unencrypted_mapping)
+    with _mapping_cache_lock:
+        _mapping_cache[key] = mapping_json
+        if len(_mapping_cache) > MAPPING_CACHE_SIZE:
+            _mapping_cache.popitem(last=False)
+    return mapping_json
+
+class UploadReader:
+    """File-like wrapper around an upload stream that hashes and keeps every byte read from it."""
+    
+    def __init__(self, source):
+        self._source = source
+        self._pending = b''
+        self._parts = []
+        self.hasher = new_file_hasher()
+    
+    def _record(self, data: bytes) -> bytes:
+        self.hasher.update(data)
+        self._parts.append(data)
+        return data
+    
+    def peek(self, size: int) -> bytes:
+        """Return up to size leading bytes; they are handed out again by the next read."""
+        self._pending = self._record(self._source.read(size))
+        return self._pending
+    
+    def read(self, size: int = -1) -> bytes:
+        if self._pending:
+            data, self._pending = self._pending, b''
+            return data
+        return self._record(self._source.read(size))
+    
+    def getvalue(self) -> bytes:
+        return b''.join(self._parts)
+
+def read_exact(stream, size: int) -> bytes:
+    """Read exactly size bytes from an upload stream, raising ValueError if it ends first."""
+    parts = []
+    remaining = size
+    while remaining:
+        data = stream.read(remaining)
+        if not data:
+            raise ValueError(f'Stream ended {remaining} bytes early')
+        parts.append(data)
+        remaining -= len(data)
+    return b''.join(parts)
+
+def _iter_bz2_stream(reader: UploadReader):
+    """Yield the decompressed output of a bz2 stream at most UPLOAD_CHUNK_SIZE bytes at a time."""
+    decompressor = bz2.BZ2Decompressor()
+    while not decompressor.eof:
+        data = b''
+        if decompressor.needs_input:
+            data = reader.read(UPLOAD_CHUNK_SIZE)
+            if not data:
+                raise ValueError('Truncated bz2 stream')
+        yield decompressor.decompress(data, max_length=UPLOAD_CHUNK_SIZE)
+
+def read_challenge_upload(source) -> Tuple[bytes, str]:
+    """
+    Read a compressed challenge package upload in chunks, validating it in the same pass.
+    
+    The compressed bytes are hashed and decompressed as they arrive; decompressed output
+    is capped at MAX_CHALLENGE_PACKAGE_SIZE and must parse as a challenge package.
+    
+    Args:
+        source: File-like object with the zstd- or bz2-compressed package
+        
+    Returns:
+        Tuple of (compressed bytes, hex digest of them from new_file_hasher); the bytes are empty
+        if nothing was uploaded
+    
+    Raises:
+        ValueError: If the package does not decompress, is too large, or is not a package
+    """
+    reader = UploadReader(source)
+    head = reader.peek(4)
+    if not head:
+        return b'', reader.hasher.hexdigest()
+    
+    if head == ZSTD_MAGIC:
+        output = get_zstd_decompressor().read_to_iter(reader, read_size=UPLOAD_CHUNK_SIZE, write_size=UPLOAD_CHUNK_SIZE)
+    else:
+        output = _iter_bz2_stream(reader)
+    
+    decompressed = bytearray()
+    try:
+        for piece in output:
+            decompressed += piece
+            if len(decompressed) > MAX_CHALLENGE_PACKAGE_SIZE:
+                raise ValueError(f'Decompressed package exceeds {MAX_CHALLENGE_PACKAGE_SIZE} bytes')
+        package = orjson.loads(decompressed)
+    except (OSError, EOFError, zstd.ZstdError, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(str(e)) from e
+    
+    if not isinstance(package, dict) or 'sequence_data' not in package or 'prize_data' not in package:
+        raise ValueError('Missing sequence_data or prize_data')
+    
+    # Drain anything after the end of the compressed stream so the hash covers the whole upload
+    while reader.read(UPLOAD_CHUNK_SIZE):
+        pass
+    return reader.getvalue(), reader.hasher.hexdigest()
 
-def ensure_timezone_aware(dt: datetime) -> datetime:
+def decode_mapping_upload(upload_bytes: bytes) -> bytes:
+    """
+    Return the JSON bytes of an uploaded mapping part, decompressing it if zstd-framed.
+    
+    Raises:
+        ValueError: If the decompressed JSON exceeds MAX_MAPPING_UPLOAD_SIZE bytes
     """
-    Convert timezone-naive datetime to timezone-aware (assuming UTC).
-    If already timezone-aware, return as-is.
+    if upload_bytes[:4] != ZSTD_MAGIC:
+        return upload_bytes
+    decompressed = bytearray()
+    for piece in get_zstd_decompressor().read_to_iter(upload_bytes, write_size=UPLOAD_CHUNK_SIZE):
+        decompressed += piece
+        if len(decompressed) > MAX_MAPPING_UPLOAD_SIZE:
+            raise ValueError(f'Decompressed unencrypted_mapping exceeds {MAX_MAPPING_UPLOAD_SIZE} bytes')
+    return bytes(decompressed)
+
+def create_mapping_sequence_hash(mapping: List[Dict[str, int]]) -> str:
+    """Create a hash of the mapping sequence for uniqueness checking.
+    
+    Kept on the stdlib encoder: the hash covers its exact output, and stored hashes must
+    keep matching resubmissions of the same mapping.
     """
-    if dt.tzinfo is None:
-        # Assume naive datetime is UTC
-        return dt.replace(tzinfo=UTC)
-    return dt
+    mapping_str = json.dumps(mapping, sort_keys=True)
+    return hashlib.sha256(mapping_str.encode()).hexdigest()
+
+def new_file_hasher():
+    """Return a fresh hash object for the compressed challenge package uniqueness hash."""
+    return hashlib.sha256()
 
 def is_session_valid(session: AuthenticationSession) -> bool:
     """Check if a session is still valid (not expired and not exceeded max attempts)."""
-    now = datetime.now(UTC)
-    expires_at_aware = ensure_timezone_aware(session.expires_at)
-    return (expires_at_aware > now and 
+    return (session.expires_at > datetime.now(UTC) and 
             session.verification_attempts < session.max_attempts and
             not session.is_verified)
 
@@ -157,40 +422,16 @@ def extend_mapping_to_length(original_mapping: List[Dict[str, int]], target_leng
     Returns:
         Extended mapping list with target_length character positions
     """
-    import random
-    import string
-    
     # If original mapping is already at or beyond target length, return as-is
     if len(original_mapping) >= target_length:
         return original_mapping[:target_length]
     
-    # Create alphabet for mappings
-    alphabet = list(string.ascii_letters + string.digits + string.punctuation + " ")
-    extended_mapping = original_mapping.copy()
-    
-    # Extend to target length
-    for i in range(len(original_mapping), target_length):
-        # Create random mapping for this position
-        alphabet_shuffled = alphabet[:]
-        random.shuffle(alphabet_shuffled)
-        
-        # Generate random segment numbers (1-segments)
-        segment_numbers = list(range(1, segments + 1))
-        random.shuffle(segment_numbers)
-        
-        # Partition alphabet into segments
-        partition_size = len(alphabet_shuffled) // segments
-        char_partitions = [alphabet_shuffled[j:j+partition_size] 
-                          for j in range(0, len(alphabet_shuffled), partition_size)]
-        
-        # Create mapping dictionary
-        mapping_dict = {}
-        for seg_num, char_group in zip(segment_numbers, char_partitions):
-            for char in char_group:
-                mapping_dict[char] = seg_num
-        
-        extended_mapping.append(mapping_dict)
+    # Every new position at once, from the OS CSPRNG like the client-side mappings;
+    # MappingGenerator memoizes the partition layout per (alphabet size, segments)
+    segment_of_char = mapping_generator.segment_matrix(target_length - len(original_mapping), segments)
     
+    extended_mapping = original_mapping.copy()
+    extended_mapping.extend(dict(zip(mapping_generator.alphabet, row)) for row in segment_of_char.tolist())
     return extended_mapping
 
 def count_recent_verification_attempts(user_id: str, hours: int = 1) -> int:
@@ -208,31 +449,169 @@ def count_recent_verification_attempts(user_id: str, hours: int = 1) -> int:
     """
     cutoff_time = datetime.now(UTC) - timedelta(hours=hours)
     
-    # Convert cutoff_time to naive for comparison with database fields that might be naive
-    cutoff_time_naive = cutoff_time.replace(tzinfo=None)
-    
     count = db.session.query(VerificationAttempt).filter(
         VerificationAttempt.user_id == user_id,
-        VerificationAttempt.attempted_at >= cutoff_time_naive,
+        VerificationAttempt.attempted_at >= cutoff_time,
         VerificationAttempt.was_successful == False  # Only count failed attempts
     ).count()
     
     return count
 
-def is_rate_limited(user_id: str) -> bool:
+def recent_failed_attempt_window(user_id: str, hours: int = 1) -> Tuple[int, Optional[datetime]]:
+    """
+    Count a user's failed verification attempts in the last N hours and find the oldest one.
+    
+    One aggregate query answered from the (user_id, was_successful, attempted_at) index.
+    
+    Args:
+        user_id: UUID of the user to check
+        hours: Number of hours to look back (default: 1)
+        
+    Returns:
+        Tuple of (failed attempt count, attempted_at of the oldest one or None)
+    """
+    cutoff_time = datetime.now(UTC) - timedelta(hours=hours)
+    
+    count, oldest = db.session.query(
+        db.func.count(),
+        db.func.min(VerificationAttempt.attempted_at)
+    ).filter(
+        VerificationAttempt.user_id == user_id,
+        VerificationAttempt.attempted_at >= cutoff_time,
+        VerificationAttempt.was_successful == False  # Only count failed attempts
+    ).one()
+    
+    return count, oldest
+
+def is_rate_limited(user_id: str, recent_failed_attempts: Optional[int] = None) -> bool:
     """
     Check if a user has exceeded the hourly rate limit for failed attempts.
     Only failed verification attempts count towards rate limiting.
     
     Args:
         user_id: UUID of the user to check
+        recent_failed_attempts: Failed attempts in the last hour, if the caller already counted them
         
     Returns:
         True if rate limited, False otherwise
     """
-    recent_failed_attempts = count_recent_verification_attempts(user_id, hours=1)
+    if recent_failed_attempts is None:
+        recent_failed_attempts = count_recent_verification_attempts(user_id, hours=1)
     return recent_failed_attempts >= VERIFICATION_ATTEMPTS_PER_HOUR_PER_CHALLENGE
 
+def store_challenge_submission(challenge_package_stream: Any, unencrypted_mapping: Any,
+                               user_id: Optional[str], key_name: Optional[str],
+                               key_index: Optional[str], segments: Optional[str]) -> Tuple[Any, int]:
+    """
+    Validate and store one challenge data submission.
+    
+    Shared by the multipart and raw-body submit endpoints once they have pulled the
+    fields out of their wire formats.
+    
+    Args:
+        challenge_package_stream: File-like upload of the zstd- or bz2-compressed challenge package, or None
+        unencrypted_mapping: Mapping JSON as bytes (optionally zstd-compressed) or str
+        user_id: UUID string identifying the user
+        key_name: String identifier for the key
+        key_index: Key index as sent by the client (string)
+        segments: Number of segments as sent by the client (string, optional)
+        
+    Returns:
+        Tuple of (JSON response, HTTP status code)
+    """
+    # Only accept compressed challenge package file; it is read, hashed and validated in one pass
+    try:
+        challenge_package_compressed, file_hash = (read_challenge_upload(challenge_package_stream)
+                                                   if challenge_package_stream is not None else (b'', None))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid compressed challenge package: {str(e)}'}), 400
+    
+    if not challenge_package_compressed:
+        return jsonify({'success': False, 'error': 'Missing challenge_package_compressed file'}), 400
+    
+    # Convert key_index to integer
+    try:
+        key_index = int(key_index) if key_index else None
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid key_index (must be integer)'}), 400
+    
+    # Convert segments to integer with default
+    try:
+        segments = int(segments) if segments else 10
+        if segments < 1:
+            return jsonify({'success': False, 'error': 'Invalid segments (must be positive integer)'}), 400
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid segments (must be integer)'}), 400
+    
+    # Parse unencrypted_mapping JSON (binary upload, optionally zstd-compressed, or legacy form field)
+    if unencrypted_mapping and len(unencrypted_mapping) > MAX_MAPPING_UPLOAD_SIZE:
+        return jsonify({'success': False, 'error': f'unencrypted_mapping exceeds {MAX_MAPPING_UPLOAD_SIZE} bytes'}), 400
+    try:
+        if isinstance(unencrypted_mapping, bytes):
+            unencrypted_mapping = decode_mapping_upload(unencrypted_mapping)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except zstd.ZstdError:
+        return jsonify({'success': False, 'error': 'Invalid unencrypted_mapping JSON'}), 400
+    try:
+        unencrypted_mapping = orjson.loads(unencrypted_mapping) if unencrypted_mapping else None
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return jsonify({'success': False, 'error': 'Invalid unencrypted_mapping JSON'}), 400
+    
+    if not all([challenge_package_compressed, unencrypted_mapping, user_id, key_name, key_index is not None]):
+        return jsonify({'success': False, 'error': 'Missing required fields: challenge_package_compressed, unencrypted_mapping, user_id, key_name, key_index'}), 400
+    
+    # Validate UUID format
+    try:
+        uuid.UUID(user_id)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid user_id format (must be UUID)'}), 400
+    
+    # Create hashes (the file hash was computed while reading the upload)
+    mapping_sequence_hash = create_mapping_sequence_hash(unencrypted_mapping)
+    
+    # Check if this exact file already exists
+    existing_file = ChallengeDataFile.query.filter_by(file_hash=file_hash).first()
+    if existing_file:
+        return jsonify({
+            'success': False, 
+            'error': 'This challenge data file has already been submitted',
+            'existing_file_id': existing_file.id
+        }), 409
+    
+    # Check if this mapping sequence already exists
+    existing_mapping = ChallengeDataFile.query.filter_by(mapping_sequence_hash=mapping_sequence_hash).first()
+    if existing_mapping:
+        return jsonify({
+            'success': False, 
+            'error': 'This mapping sequence has already been submitted',
+            'existing_file_id': existing_mapping.id
+        }), 409
+    
+    # Extend the mapping to target length before storing
+    extended_mapping = extend_mapping_to_length(unencrypted_mapping, 64, segments)
+    
+    # Create new challenge data file record
+    challenge_data_file = ChallengeDataFile(
+        user_id=user_id,
+        key_name=key_name,
+        key_index=key_index,
+        file_hash=file_hash,
+        challenge_package=challenge_package_compressed,
+        unencrypted_mapping=compress_mapping(extended_mapping),
+        mapping_sequence_hash=mapping_sequence_hash
+    )
+    
+    db.session.add(challenge_data_file)
+    db.session.commit()
+    
+    logger.info(f"New challenge data file submitted with ID: {challenge_data_file.id} for user: {user_id}")
+    
+    return jsonify({
+        'success': True,
+        'message': 'Challenge data file submitted successfully'
+    }), 201
+
 # Routes
 @app.route('/submit_challenge_data', methods=['POST'])
 def submit_challenge_data():
@@ -242,100 +621,59 @@ def submit_challenge_data():
     try:
         # Get form data
         challenge_package_file = request.files.get('challenge_package_compressed')
-        unencrypted_mapping = request.form.get('unencrypted_mapping')
-        user_id = request.form.get('user_id')
-        key_name = request.form.get('key_name')
-        key_index = request.form.get('key_index')
-        segments = request.form.get('segments')
-        
-        # Only accept compressed challenge package file
-        if not challenge_package_file:
-            return jsonify({'success': False, 'error': 'Missing challenge_package_compressed file'}), 400
+        unencrypted_mapping_file = request.files.get('unencrypted_mapping')
+        # Read one byte past the limit so an oversized part is rejected without buffering all of it
+        unencrypted_mapping = (unencrypted_mapping_file.read(MAX_MAPPING_UPLOAD_SIZE + 1) if unencrypted_mapping_file
+                               else request.form.get('unencrypted_mapping'))
+        
+        return store_challenge_submission(
+            challenge_package_file.stream if challenge_package_file else None,
+            unencrypted_mapping,
+            request.form.get('user_id'),
+            request.form.get('key_name'),
+            request.form.get('key_index'),
+            request.form.get('segments')
+        )
         
-        # Convert key_index to integer
+    except Exception as e:
+        logger.error(f"Error submitting challenge data: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/v2/submit_challenge_data', methods=['POST'])
+def submit_challenge_data_v2():
+    """
+    Endpoint for client to post a challenge package as the raw request body.
+    
+    The body (application/octet-stream) is the mapping JSON, optionally zstd-compressed,
+    immediately followed by the compressed package, so no multipart encoding or parsing is
+    needed. X-Mapping-Length gives the size of the mapping section; the other scalar fields
+    travel in X-* headers.
+    """
+    try:
         try:
-            key_index = int(key_index) if key_index else None
+            mapping_length = int(request.headers.get('X-Mapping-Length', ''))
         except ValueError:
-            return jsonify({'success': False, 'error': 'Invalid key_index (must be integer)'}), 400
+            return jsonify({'success': False, 'error': 'Missing or invalid X-Mapping-Length header (must be integer)'}), 400
+        if not 0 < mapping_length <= MAX_MAPPING_UPLOAD_SIZE:
+            return jsonify({'success': False, 'error': f'X-Mapping-Length must be between 1 and {MAX_MAPPING_UPLOAD_SIZE}'}), 400
         
-        # Convert segments to integer with default
+        # Split the mapping section off the front of the body; the rest of the stream is the package
         try:
-            segments = int(segments) if segments else 10
-            if segments < 1:
-                return jsonify({'success': False, 'error': 'Invalid segments (must be positive integer)'}), 400
+            unencrypted_mapping = read_exact(request.stream, mapping_length)
         except ValueError:
-            return jsonify({'success': False, 'error': 'Invalid segments (must be integer)'}), 400
+            return jsonify({'success': False, 'error': 'Request body is shorter than X-Mapping-Length'}), 400
         
-        # Parse unencrypted_mapping JSON
-        try:
-            unencrypted_mapping = json.loads(unencrypted_mapping) if unencrypted_mapping else None
-        except json.JSONDecodeError:
-            return jsonify({'success': False, 'error': 'Invalid unencrypted_mapping JSON'}), 400
-        
-        if not all([challenge_package_file, unencrypted_mapping, user_id, key_name, key_index is not None]):
-            return jsonify({'success': False, 'error': 'Missing required fields: challenge_package_compressed, unencrypted_mapping, user_id, key_name, key_index'}), 400
+        key_name = request.headers.get('X-Key-Name')
         
-        # Validate UUID format
-        try:
-            uuid.UUID(user_id)
-        except ValueError:
-            return jsonify({'success': False, 'error': 'Invalid user_id format (must be UUID)'}), 400
-        
-        # Read the compressed challenge package data
-        challenge_package_compressed = challenge_package_file.read()
-        
-        # Validate that we can decompress the data
-        try:
-            decompress_challenge_package(challenge_package_compressed)
-        except Exception as e:
-            return jsonify({'success': False, 'error': f'Invalid compressed challenge package: {str(e)}'}), 400
-        
-        # Create hashes
-        file_hash = create_file_hash(challenge_package_compressed)
-        mapping_sequence_hash = create_mapping_sequence_hash(unencrypted_mapping)
-        
-        # Check if this exact file already exists
-        existing_file = ChallengeDataFile.query.filter_by(file_hash=file_hash).first()
-        if existing_file:
-            return jsonify({
-                'success': False, 
-                'error': 'This challenge data file has already been submitted',
-                'existing_file_id': existing_file.id
-            }), 409
-        
-        # Check if this mapping sequence already exists
-        existing_mapping = ChallengeDataFile.query.filter_by(mapping_sequence_hash=mapping_sequence_hash).first()
-        if existing_mapping:
-            return jsonify({
-                'success': False, 
-                'error': 'This mapping sequence has already been submitted',
-                'existing_file_id': existing_mapping.id
-            }), 409
-        
-        # Extend the mapping to target length before storing
-        extended_mapping = extend_mapping_to_length(unencrypted_mapping, 64, segments)
-        
-        # Create new challenge data file record
-        challenge_data_file = ChallengeDataFile(
-            user_id=user_id,
-            key_name=key_name,
-            key_index=key_index,
-            file_hash=file_hash,
-            challenge_package=challenge_package_compressed,
-            unencrypted_mapping=json.dumps(extended_mapping),
-            mapping_sequence_hash=mapping_sequence_hash
+        return store_challenge_submission(
+            request.stream,
+            unencrypted_mapping,
+            request.headers.get('X-User-Id'),
+            urllib.parse.unquote(key_name) if key_name else None,
+            request.headers.get('X-Key-Index'),
+            request.headers.get('X-Segments')
         )
         
-        db.session.add(challenge_data_file)
-        db.session.commit()
-        
-        logger.info(f"New challenge data file submitted with ID: {challenge_data_file.id} for user: {user_id}")
-        
-        return jsonify({
-            'success': True,
-            'message': 'Challenge data file submitted successfully'
-        }), 201
-        
     except Exception as e:
         logger.error(f"Error submitting challenge data: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -393,18 +731,20 @@ def get_authentication_challenge():
         db.session.add(auth_session)
         db.session.commit()
         
-        # Get the stored mapping (already extended to 64 characters)
-        stored_mapping = json.loads(unused_file.unencrypted_mapping)
+        # Get the stored mapping (already extended to 64 characters) as JSON bytes
+        stored_mapping_json = load_stored_mapping_json(unused_file)
         
         logger.info(f"Authentication challenge created with session token: {session_token} for user: {user_id}, key: {key_name}, index: {unused_file.key_index}")
         
-        return jsonify({
+        # Encode the small fields, then splice the stored mapping JSON in as the last member
+        body = orjson.dumps({
             'success': True,
             'session_token': session_token,
-            'mapping': stored_mapping,
-            'expires_at': ensure_timezone_aware(expires_at).isoformat(),
+            'expires_at': expires_at.isoformat(),
             'timeout_minutes': timeout_minutes
-        }), 200
+        })
+        body = body[:-1] + b',"mapping":' + stored_mapping_json + b'}'
+        return Response(body, status=200, mimetype='application/json')
         
     except Exception as e:
         logger.error(f"Error creating authentication challenge: {str(e)}")
@@ -417,19 +757,40 @@ def verify_solution():
     Only allows one successful verification per unique mapping sequence.
     """
     try:
-        data = request.json
-        session_token = data.get('session_token')
-        target_sequence = data.get('target_sequence')
-        verifier_private_key_b64 = data.get('verifier_private_key')
-        
-        if not all([session_token, target_sequence, verifier_private_key_b64]):
+        if request.mimetype == 'multipart/form-data':
+            # Multipart upload: raw key bytes and a JSON-encoded target sequence
+            session_token = request.form.get('session_token')
+            key_file = request.files.get('verifier_private_key')
+            if key_file is None:
+                return jsonify({'success': False, 'error': 'Missing verifier_private_key file part'}), 400
+            verifier_private_key = key_file.read()
+            try:
+                target_sequence = orjson.loads(request.form.get('target_sequence') or 'null')
+            except json.JSONDecodeError:
+                return jsonify({'success': False, 'error': 'Invalid target_sequence format'}), 400
+        else:
+            data = request.json
+            session_token = data.get('session_token')
+            target_sequence = data.get('target_sequence')
+            verifier_private_key = data.get('verifier_private_key')
+            
+            # Decode the base64 verifier private key
+            if verifier_private_key:
+                try:
+                    verifier_private_key = base64.b64decode(verifier_private_key)
+                except Exception:
+                    return jsonify({'success': False, 'error': 'Invalid verifier private key format'}), 400
+        
+        if not all([session_token, target_sequence, verifier_private_key]):
             return jsonify({
                 'success': False, 
                 'error': 'Missing session_token, target_sequence, or verifier_private_key'
             }), 400
         
-        # Find the authentication session
-        auth_session = AuthenticationSession.query.filter_by(session_token=session_token).first()
+        # Find the authentication session, loading its data file (and package) in the same query
+        auth_session = AuthenticationSession.query.options(
+            joinedload(AuthenticationSession.data_file)
+        ).filter_by(session_token=session_token).first()
         if not auth_session:
             return jsonify({'success': False, 'error': 'Invalid session token'}), 404
         
@@ -440,34 +801,24 @@ def verify_solution():
                 'error': 'Session expired or maximum attempts exceeded'
             }), 410
         
-        # Check hourly rate limit for this user
-        if is_rate_limited(auth_session.user_id):
-            recent_failed_attempts = count_recent_verification_attempts(auth_session.user_id)
+        # Check hourly rate limit for this user (counted once, reused for the message)
+        recent_failed_attempts = count_recent_verification_attempts(auth_session.user_id)
+        if is_rate_limited(auth_session.user_id, recent_failed_attempts):
             return jsonify({
                 'success': False, 
                 'error': f'Rate limit exceeded: {recent_failed_attempts}/{VERIFICATION_ATTEMPTS_PER_HOUR_PER_CHALLENGE} failed attempts in the last hour for this user'
             }), 429
         
-        # Check if this mapping sequence has already been successfully verified
-        existing_success = VerificationAttempt.query.join(AuthenticationSession).filter(
-            AuthenticationSession.mapping_sequence_hash == auth_session.mapping_sequence_hash,
-            VerificationAttempt.was_successful == True
-        ).first()
-        
-        if existing_success:
+        # Check if this mapping sequence has already been successfully verified; mapping
+        # sequences are unique per data file, and a success marks the file as used
+        if auth_session.data_file.is_used:
             return jsonify({
                 'success': False, 
                 'error': 'This mapping sequence has already been successfully verified'
             }), 409
         
-        # Decode the verifier private key
-        try:
-            verifier_private_key = base64.b64decode(verifier_private_key_b64)
-        except Exception:
-            return jsonify({'success': False, 'error': 'Invalid verifier private key format'}), 400
-        
         # Get the challenge package from the data file (decompress it)
-        challenge_package = decompress_challenge_package(bytes(auth_session.data_file.challenge_package))
+        challenge_package = decompress_challenge_package(auth_session.data_file.challenge_package)
         
         # Perform verification using MysteryProtocol
         try:
@@ -543,10 +894,8 @@ def get_stats():
     try:
         total_files = ChallengeDataFile.query.count()
         used_files = ChallengeDataFile.query.filter_by(is_used=True).count()
-        # Convert to naive datetime for comparison with database fields that might be naive
-        now_naive = datetime.now(UTC).replace(tzinfo=None)
         active_sessions = AuthenticationSession.query.filter(
-            AuthenticationSession.expires_at > now_naive,
+            AuthenticationSession.expires_at > datetime.now(UTC),
             AuthenticationSession.is_verified == False
         ).count()
         total_attempts = VerificationAttempt.query.count()
@@ -554,12 +903,11 @@ def get_stats():
         
         # Calculate rate limiting stats
         cutoff_time = datetime.now(UTC) - timedelta(hours=1)
-        cutoff_time_naive = cutoff_time.replace(tzinfo=None)
         recent_attempts_all = db.session.query(VerificationAttempt).filter(
-            VerificationAttempt.attempted_at >= cutoff_time_naive
+            VerificationAttempt.attempted_at >= cutoff_time
         ).count()
         recent_failed_attempts = db.session.query(VerificationAttempt).filter(
-            VerificationAttempt.attempted_at >= cutoff_time_naive,
+            VerificationAttempt.attempted_at >= cutoff_time,
             VerificationAttempt.was_successful == False
         ).count()
         
@@ -594,24 +942,15 @@ def get_rate_limit_status(session_token):
         if not auth_session:
             return jsonify({'success': False, 'error': 'Session not found'}), 404
         
-        recent_failed_attempts = count_recent_verification_attempts(auth_session.user_id)
-        is_limited = is_rate_limited(auth_session.user_id)
+        # Count and oldest failed attempt in the hour come from one aggregate query
+        recent_failed_attempts, oldest_failed_attempt_at = recent_failed_attempt_window(auth_session.user_id)
+        is_limited = is_rate_limited(auth_session.user_id, recent_failed_attempts)
         remaining_failed_attempts = max(0, VERIFICATION_ATTEMPTS_PER_HOUR_PER_CHALLENGE - recent_failed_attempts)
         
         # Calculate time until rate limit resets (when oldest failed attempt in the hour expires)
-        cutoff_time = datetime.now(UTC) - timedelta(hours=1)
-        cutoff_time_naive = cutoff_time.replace(tzinfo=None)
-        oldest_failed_attempt = db.session.query(VerificationAttempt).filter(
-            VerificationAttempt.user_id == auth_session.user_id,
-            VerificationAttempt.attempted_at >= cutoff_time_naive,
-            VerificationAttempt.was_successful == False
-        ).order_by(VerificationAttempt.attempted_at.asc()).first()
-        
         reset_time = None
-        if oldest_failed_attempt:
-            # Ensure timezone-aware datetime for reset_time calculation
-            attempt_time_aware = ensure_timezone_aware(oldest_failed_attempt.attempted_at)
-            reset_time = (attempt_time_aware + timedelta(hours=1)).isoformat()
+        if oldest_failed_attempt_at:
+            reset_time = (oldest_failed_attempt_at + timedelta(hours=1)).isoformat()
         
         return jsonify({
             'success': True,
@@ -630,7 +969,29 @@ def get_rate_limit_status(session_token):
         logger.error(f"Error getting rate limit status: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
-
+@app.after_request
+def compress_response(response):
+    """Compress large JSON responses with zstd or gzip when the client accepts it."""
+    if (response.mimetype != 'application/json' or response.direct_passthrough
+            or 'Content-Encoding' in response.headers):
+        return response
+    
+    body = response.get_data()
+    if len(body) < RESPONSE_COMPRESSION_MIN_SIZE:
+        return response
+    
+    accepted = request.accept_encodings
+    if 'zstd' in accepted:
+        response.set_data(get_zstd_compressor().compress(body))
+        response.headers['Content-Encoding'] = 'zstd'
+    elif 'gzip' in accepted:
+        response.set_data(gzip.compress(body, compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    return response
 
 if __name__ == '__main__':
     with app.app_context():
@@ -6,105 +6,192 @@ This example demonstrates the full interactive protocol between a Verifier and D
 including key generation, prize creation, commitment schemes, and final verification.
 """
 
+import io
+import os
+import sys
+import json
+import atexit
+import argparse
 import logging
-from mystery_protocol import MysteryProtocol, serialize_to_json, load_from_json, save_binary_data, load_binary_data
+import functools
+import orjson
+from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+from mystery_protocol import MysteryProtocol, json_default, load_from_json, load_binary_data
 
 # Configure logging to see the protocol steps
 logging.basicConfig(
     level=logging.INFO,  # Use INFO to see main steps, DEBUG for detailed logs
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(created).3f - %(name)s - %(levelname)s - %(message)s'  # epoch seconds; skips strftime per record
 )
 
+# Shared by both demonstrations; the protocol object holds no per-run state
+protocol = MysteryProtocol()
+
+# Status output is collected here and written to stdout once per stage
+_output = io.StringIO()
+_quiet = False
+
+def _emit(*args) -> None:
+    """Buffer a line of status output (same arguments as print)."""
+    print(*args, file=_output)
+
+def _flush_output() -> None:
+    """Write the buffered status output in one call, or drop it in quiet mode."""
+    if not _quiet:
+        sys.stdout.write(_output.getvalue())
+        sys.stdout.flush()
+    _output.seek(0)
+    _output.truncate()
+
+def _atomic_write(path, data: bytes) -> None:
+    """Write data to a temporary file in one buffered write, then rename it over path so readers never see a partial file."""
+    path = Path(path)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb', buffering=1 << 20) as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def _prize_hex(prize: int) -> str:
+    """Format a prize as 0x-prefixed hex, zero-padded to 256 bits."""
+    return '0x' + prize.to_bytes(max(32, (prize.bit_length() + 7) // 8), 'big').hex()
+
+# Single background writer: each stage's JSON artifact is flushed while the next stage runs
+_writer = ThreadPoolExecutor(max_workers=1)
+atexit.register(_writer.shutdown)
+
+def _encode_json(data) -> bytes:
+    """Encode data as JSON with orjson, falling back to the stdlib for integers wider than 64 bits (e.g. the prize)."""
+    try:
+        return orjson.dumps(data, default=json_default, option=orjson.OPT_INDENT_2)
+    except orjson.JSONEncodeError:
+        return json.dumps(data, indent=2, default=json_default).encode()
+
+def _async_write(data, filename: str) -> Future:
+    """
+    Encode and write a JSON artifact on the writer thread.
+    
+    Args:
+        data: Protocol data to serialize (ciphertext bytes are stored as base64)
+        filename: Output filename
+        
+    Returns:
+        Future to wait on before reading the file back
+    """
+    return _writer.submit(lambda: _atomic_write(filename, _encode_json(data)))
+
+@functools.lru_cache(maxsize=1)
+def _get_keys():
+    """
+    Provision keys once and reuse them for the rest of the process.
+    
+    Key generation is the most expensive step of the demo, so both demonstrations share
+    one key set instead of generating a second one. Contexts built during provisioning
+    stay cached in mystery_protocol, so keys read back from disk are not re-parsed either.
+    
+    Returns:
+        Tuple of (verifier_keys, owner_keys) dictionaries
+    """
+    return protocol.provision_keys()
+
 def main():
     """Complete protocol demonstration."""
-    print("=" * 80)
-    print("SECURE PROTOCOL DEMONSTRATION")
-    print("=" * 80)
+    _emit("=" * 80)
+    _emit("SECURE PROTOCOL DEMONSTRATION")
+    _emit("=" * 80)
     
     # Test parameters
     secret_string = "Hello123!"
     mapping_length = len(secret_string)
     segments = 10
     
-    print(f"Secret string: '{secret_string}'")
-    print(f"Length: {mapping_length}")
-    print()
+    _emit(f"Secret string: '{secret_string}'")
+    _emit(f"Length: {mapping_length}")
+    _emit()
     
-    # Initialize protocol
-    protocol = MysteryProtocol()
+    _flush_output()
     
     # =============================================================================
     # STAGE 1: KEY PROVISIONING AND PRIZE GENERATION
     # =============================================================================
-    print("STAGE 1: Key Provisioning and Prize Generation")
-    print("-" * 50)
+    _emit("STAGE 1: Key Provisioning and Prize Generation")
+    _emit("-" * 50)
     
     # Generate keys for both parties
-    verifier_keys, owner_keys = protocol.provision_keys("demo")
+    verifier_keys, owner_keys = _get_keys()
+    
+    # Pending artifact writes; waited on before reporting success so write errors surface
+    artifacts = []
     
     # Save keys to files (in practice, parties would exchange public keys)
-    save_binary_data(verifier_keys['private_key'], "verifier_private.key")
-    save_binary_data(verifier_keys['public_context'], "verifier_public.context")
-    save_binary_data(owner_keys['private_key'], "owner_private.key")
-    save_binary_data(owner_keys['public_context'], "owner_public.context")
+    _atomic_write("verifier_private.key", verifier_keys['private_key'])
+    _atomic_write("verifier_public.context", verifier_keys['public_context'])
+    _atomic_write("owner_private.key", owner_keys['private_key'])
+    _atomic_write("owner_public.context", owner_keys['public_context'])
     
     # Generate the secret prize
     prize_data = protocol.generate_prize(owner_keys['public_context'])
-    serialize_to_json(prize_data, "prize_data.json")
+    artifacts.append(_async_write(prize_data, "prize_data.json"))
     
-    print(f"✅ Keys generated and prize created")
-    print(f"   Prize value: 0x{prize_data['original_prize_for_reference']:064x}")
-    print()
+    _emit(f"✅ Keys generated and prize created")
+    _emit(f"   Prize value: {_prize_hex(prize_data['original_prize_for_reference'])}")
+    _emit()
+    
+    _flush_output()
     
     # =============================================================================
     # STAGE 2: VERIFIER GENERATES MAPPINGS AND COMMITS
     # =============================================================================
-    print("STAGE 2: Verifier Generates Mappings and Commits")
-    print("-" * 50)
+    _emit("STAGE 2: Verifier Generates Mappings and Commits")
+    _emit("-" * 50)
     
     # Verifier generates secret mappings
     mappings_data = protocol.generate_mappings(mapping_length, segments)
-    serialize_to_json(mappings_data, "secret_mappings.json")
+    artifacts.append(_async_write(mappings_data, "secret_mappings.json"))
     
     # Get the correct sequence for demonstration
     correct_sequence = protocol.get_correct_sequence(
         mappings_data['secret_mappings'], 
         secret_string
     )
-    print(f"✅ Secret mappings generated")
-    print(f"   Correct sequence for '{secret_string}': {correct_sequence}")
+    _emit(f"✅ Secret mappings generated")
+    _emit(f"   Correct sequence for '{secret_string}': {correct_sequence}")
     
     # Verifier creates commitment
     commitment_package = protocol.verifier_commit(mappings_data['secret_mappings'])
-    serialize_to_json(commitment_package, "commitment_package.json")
+    artifacts.append(_async_write(commitment_package, "commitment_package.json"))
     
     # In practice, only the commitment hash would be sent to the owner
     commitment_hash = commitment_package['commitment']
-    print(f"✅ Commitment created: {commitment_hash[:16]}...")
-    print()
+    _emit(f"✅ Commitment created: {commitment_hash[:16]}...")
+    _emit()
+    
+    _flush_output()
     
     # =============================================================================
     # STAGE 3: OWNER REGISTERS DATA
     # =============================================================================
-    print("STAGE 3: Owner Registers Secret Data")
-    print("-" * 50)
+    _emit("STAGE 3: Owner Registers Secret Data")
+    _emit("-" * 50)
     
     # Owner encrypts their secret string
     registered_data = protocol.owner_register_data(
         owner_keys['private_key'], 
         secret_string
     )
-    serialize_to_json(registered_data, "registered_data.json")
+    artifacts.append(_async_write(registered_data, "registered_data.json"))
+    
+    _emit(f"✅ Secret string encrypted and registered")
+    _emit(f"   Encrypted {len(registered_data)} character vectors")
+    _emit()
     
-    print(f"✅ Secret string encrypted and registered")
-    print(f"   Encrypted {len(registered_data)} character vectors")
-    print()
+    _flush_output()
     
     # =============================================================================
     # STAGE 4: VERIFIER TRANSFORMS DATA
     # =============================================================================
-    print("STAGE 4: Verifier Transforms Data")
-    print("-" * 50)
+    _emit("STAGE 4: Verifier Transforms Data")
+    _emit("-" * 50)
     
     # Verifier applies mappings to the encrypted data
     reveal_package = protocol.verifier_transform_data(
@@ -112,17 +199,19 @@ def main():
         registered_data,
         commitment_package
     )
-    serialize_to_json(reveal_package, "reveal_package.json")
+    artifacts.append(_async_write(reveal_package, "reveal_package.json"))
     
-    print(f"✅ Data transformed and secrets revealed")
-    print(f"   Transformed {len(reveal_package['transformed_vectors'])} vectors")
-    print()
+    _emit(f"✅ Data transformed and secrets revealed")
+    _emit(f"   Transformed {len(reveal_package['transformed_vectors'])} vectors")
+    _emit()
+    
+    _flush_output()
     
     # =============================================================================
     # STAGE 5: OWNER FINALIZES DATA
     # =============================================================================
-    print("STAGE 5: Owner Finalizes Data and Re-encrypts Prize")
-    print("-" * 50)
+    _emit("STAGE 5: Owner Finalizes Data and Re-encrypts Prize")
+    _emit("-" * 50)
     
     # Owner verifies commitment and finalizes the protocol
     final_package = protocol.owner_finalize_data(
@@ -133,17 +222,19 @@ def main():
         prize_data,
         include_debug_info=True  # Include debug info for demonstration
     )
-    serialize_to_json(final_package, "final_package.json")
+    artifacts.append(_async_write(final_package, "final_package.json"))
+    
+    _emit(f"✅ Data finalized and prize re-encrypted for verifier")
+    _emit(f"   Prize protected with password-dependent hash")
+    _emit()
     
-    print(f"✅ Data finalized and prize re-encrypted for verifier")
-    print(f"   Prize protected with password-dependent hash")
-    print()
+    _flush_output()
     
     # =============================================================================
     # STAGE 6: VERIFIER VERIFICATION (SUCCESS CASE)
     # =============================================================================
-    print("STAGE 6: Verifier Verification - SUCCESS CASE")
-    print("-" * 50)
+    _emit("STAGE 6: Verifier Verification - SUCCESS CASE")
+    _emit("-" * 50)
     
     # Verifier performs final verification with correct sequence
     is_match, unlocked_prize = protocol.verifier_verify(
@@ -152,24 +243,26 @@ def main():
         correct_sequence
     )
     
-    print(f"✅ Verification with correct sequence:")
-    print(f"   Match: {is_match}")
+    _emit(f"✅ Verification with correct sequence:")
+    _emit(f"   Match: {is_match}")
     if is_match:
-        print(f"   🎁 PRIZE UNLOCKED: 0x{unlocked_prize:064x}")
-        print(f"   🎁 PRIZE (decimal): {unlocked_prize}")
+        _emit(f"   🎁 PRIZE UNLOCKED: {_prize_hex(unlocked_prize)}")
+        _emit(f"   🎁 PRIZE (decimal): {unlocked_prize}")
         
         # Verify it matches the original
         original_prize = prize_data['original_prize_for_reference']
-        print(f"   ✅ Matches original: {unlocked_prize == original_prize}")
+        _emit(f"   ✅ Matches original: {unlocked_prize == original_prize}")
     else:
-        print(f"   🔒 Prize remains locked")
-    print()
+        _emit(f"   🔒 Prize remains locked")
+    _emit()
+    
+    _flush_output()
     
     # =============================================================================
     # STAGE 7: VERIFIER VERIFICATION (FAILURE CASE)
     # =============================================================================
-    print("STAGE 7: Verifier Verification - FAILURE CASE")
-    print("-" * 50)
+    _emit("STAGE 7: Verifier Verification - FAILURE CASE")
+    _emit("-" * 50)
     
     # Try with wrong sequence
     wrong_sequence = [x + 1 for x in correct_sequence]  # Modify sequence
@@ -180,30 +273,32 @@ def main():
         wrong_sequence
     )
     
-    print(f"✅ Verification with wrong sequence {wrong_sequence}:")
-    print(f"   Match: {is_match_wrong}")
-    print(f"   🔒 Prize remains locked (value: {unlocked_prize_wrong})")
-    print()
+    _emit(f"✅ Verification with wrong sequence {wrong_sequence}:")
+    _emit(f"   Match: {is_match_wrong}")
+    _emit(f"   🔒 Prize remains locked (value: {unlocked_prize_wrong})")
+    _emit()
+    
+    _flush_output()
     
     # =============================================================================
     # DEMONSTRATION OF DIFFERENT SCENARIOS
     # =============================================================================
-    print("ADDITIONAL DEMONSTRATIONS")
-    print("-" * 50)
+    _emit("ADDITIONAL DEMONSTRATIONS")
+    _emit("-" * 50)
     
     # Test with different string
     test_string = "Test456"
     if len(test_string) <= mapping_length:
         # Pad or truncate to match mapping length
-        test_string = test_string.ljust(mapping_length)[:mapping_length]
+        test_string = test_string[:mapping_length].ljust(mapping_length)
         
         test_sequence = protocol.get_correct_sequence(
             mappings_data['secret_mappings'], 
             test_string
         )
-        print(f"📝 Different string test:")
-        print(f"   String: '{test_string}'")
-        print(f"   Correct sequence: {test_sequence}")
+        _emit(f"📝 Different string test:")
+        _emit(f"   String: '{test_string}'")
+        _emit(f"   Correct sequence: {test_sequence}")
         
         # This would fail verification since the registered data is for the original string
         is_match_test, _ = protocol.verifier_verify(
@@ -211,56 +306,60 @@ def main():
             final_package,
             test_sequence
         )
-        print(f"   Match with original data: {is_match_test} (Expected: False)")
+        _emit(f"   Match with original data: {is_match_test} (Expected: False)")
     
-    print()
-    print("=" * 80)
-    print("PROTOCOL DEMONSTRATION COMPLETE")
-    print("=" * 80)
+    # Raise any encode or write error from the writer thread before claiming success
+    for artifact in artifacts:
+        artifact.result()
+    
+    _emit()
+    _emit("=" * 80)
+    _emit("PROTOCOL DEMONSTRATION COMPLETE")
+    _emit("=" * 80)
     
     # Summary
-    print("\nSUMMARY:")
-    print(f"✅ Protocol executed successfully")
-    print(f"✅ Correct sequence unlocked the prize")
-    print(f"✅ Wrong sequence kept the prize locked")
-    print(f"✅ Reed-Solomon error correction preserved data integrity")
-    print(f"✅ Commitment scheme prevented verifier cheating")
-    print(f"✅ Password-dependent encryption secured the prize")
+    _emit("\nSUMMARY:")
+    _emit(f"✅ Protocol executed successfully")
+    _emit(f"✅ Correct sequence unlocked the prize")
+    _emit(f"✅ Wrong sequence kept the prize locked")
+    _emit(f"✅ Reed-Solomon error correction preserved data integrity")
+    _emit(f"✅ Commitment scheme prevented verifier cheating")
+    _emit(f"✅ Password-dependent encryption secured the prize")
+    _flush_output()
 
 def demonstrate_file_based_workflow():
     """
     Demonstrate how the protocol would work with file-based communication
     between parties (more realistic scenario).
     """
-    print("\n" + "=" * 80)
-    print("FILE-BASED WORKFLOW DEMONSTRATION")
-    print("=" * 80)
+    _emit("\n" + "=" * 80)
+    _emit("FILE-BASED WORKFLOW DEMONSTRATION")
+    _emit("=" * 80)
     
-    protocol = MysteryProtocol()
     secret_string = "Secret42"
     
-    print(f"Demonstrating file-based workflow for: '{secret_string}'")
-    print()
+    _emit(f"Demonstrating file-based workflow for: '{secret_string}'")
+    _emit()
     
-    # Step 1: Generate and save keys
-    print("1. Generating and saving keys...")
-    verifier_keys, owner_keys = protocol.provision_keys("workflow")
+    # Step 1: Get keys (provisioned once and reused from the first demonstration) and save them
+    _emit("1. Getting and saving keys...")
+    verifier_keys, owner_keys = _get_keys()
     
-    save_binary_data(verifier_keys['private_key'], "workflow_verifier_private.key")
-    save_binary_data(verifier_keys['public_context'], "workflow_verifier_public.context")
-    save_binary_data(owner_keys['private_key'], "workflow_owner_private.key")
-    save_binary_data(owner_keys['public_context'], "workflow_owner_public.context")
+    _atomic_write("workflow_verifier_private.key", verifier_keys['private_key'])
+    _atomic_write("workflow_verifier_public.context", verifier_keys['public_context'])
+    _atomic_write("workflow_owner_private.key", owner_keys['private_key'])
+    _atomic_write("workflow_owner_public.context", owner_keys['public_context'])
     
     # Step 2: Generate prize and mappings
-    print("2. Generating prize and mappings...")
+    _emit("2. Generating prize and mappings...")
     prize_data = protocol.generate_prize(owner_keys['public_context'])
-    serialize_to_json(prize_data, "workflow_prize.json")
+    prize_written = _async_write(prize_data, "workflow_prize.json")
     
     mappings_data = protocol.generate_mappings(len(secret_string))
-    serialize_to_json(mappings_data, "workflow_mappings.json")
+    mappings_written = _async_write(mappings_data, "workflow_mappings.json")
     
     # Step 3: Load from files and continue protocol
-    print("3. Loading from files and executing protocol...")
+    _emit("3. Loading from files and executing protocol...")
     
     # Load keys from files
     verifier_private_key = load_binary_data("workflow_verifier_private.key")
@@ -268,7 +367,9 @@ def demonstrate_file_based_workflow():
     owner_private_key = load_binary_data("workflow_owner_private.key")
     owner_public_context = load_binary_data("workflow_owner_public.context")
     
-    # Load data from files
+    # Load data from files once the writer has flushed them
+    prize_written.result()
+    mappings_written.result()
     prize_data = load_from_json("workflow_prize.json")
     mappings_data = load_from_json("workflow_mappings.json")
     
@@ -304,10 +405,21 @@ def demonstrate_file_based_workflow():
         correct_sequence
     )
     
-    print(f"✅ File-based workflow completed successfully")
-    print(f"   Prize unlocked: {is_match}")
-    print(f"   Prize value: 0x{unlocked_prize:064x}")
+    _emit(f"✅ File-based workflow completed successfully")
+    _emit(f"   Prize unlocked: {is_match}")
+    _emit(f"   Prize value: {_prize_hex(unlocked_prize)}")
+    _flush_output()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the MysteryProtocol demonstrations")
+    parser.add_argument('--quiet', action='store_true', help="Suppress status output (protocol logging is unaffected)")
+    _quiet = parser.parse_args().quiet
+    
+    # The log format uses no thread or process fields, so don't collect them for each record
+    # (set here rather than at import, since these flags are process-wide)
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    
     main()
     demonstrate_file_based_workflow()